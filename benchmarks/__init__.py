@@ -0,0 +1,2 @@
+# Benchmarks of prefa, see `python -m benchmarks.run --help`
+__all__ = ['workloads', 'run']
@@ -0,0 +1,222 @@
+##############################################################################
+# Author: Jose, Robert & King                                                #
+#  Date:  2019.01.15                                                         #
+##############################################################################
+
+import prefa
+from prefa import ere, nfa, dfa, stream, profiling
+from benchmarks import workloads
+import argparse
+import datetime
+import json
+import platform
+import sys
+import time
+# import ere, nfa, dfa, stream, profiling
+
+UNITS = {'': 1, 'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+
+def parseSize(text):
+    """Parses a byte count like '64K', '1M' or '2G'.
+
+    Args:
+        text - str, the count, with an optional K / M / G suffix
+
+    Returns:
+        int, number of bytes
+    """
+    text = text.strip().upper()
+    unit = text[-1:] if text[-1:] in UNITS else ''
+    return int(text[:len(text) - len(unit)]) * UNITS[unit]
+
+def timed(func, repeat=1):
+    """Calls FUNC REPEAT times.
+
+    Args:
+        func   - function, the phase to time, taking no argument
+        repeat - int     , times to call it
+
+    Returns:
+        (result, seconds) - tuple, the last result, and the best time
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return result, best
+
+def scan(engine, chunks):
+    """Feeds a whole text into an engine, keeping the chunks out of the
+    timing.
+
+    Args:
+        engine - CompiledDFA or BitNFA, the automata to run
+        chunks - iterable, bytes chunks of the text
+
+    Returns:
+        (accepted, seconds, fed) - tuple, whether the text is accepted, the
+                                   time spent feeding it, and the number of
+                                   bytes fed before the matcher died
+    """
+    matcher, seconds = stream.StreamMatcher(engine), 0.0
+    for chunk in chunks:
+        start = time.perf_counter()
+        matcher.feed(chunk)
+        seconds += time.perf_counter() - start
+        if matcher.is_dead:
+            break
+    return matcher.is_accepting, seconds, matcher.count
+
+def runPattern(pattern, texts=(), repeat=1, method='thompson',
+               simulate_limit=65536):
+    """Times every phase of building and running the automata of a pattern.
+
+    The phases are parsing ('regex'), building the NFA ('nfa'), building
+    the DFA from the Regex ('dfa'), minimizing it ('minimal'), and turning
+    the minimal DFA / the NFA into their matchers ('compile_dfa' /
+    'compile_nfa'). Every text is then streamed through both matchers, and
+    texts of at most SIMULATE_LIMIT bytes are also checked by simulate() of
+    the minimal DFA and of the NFA, which is much slower. While profiling
+    is enabled, the Stats of every object built are kept too.
+
+    Args:
+        pattern        - str, the Regular Expression
+        texts          - list, (size, function) pairs, where the function
+                               gives the chunks of a text of SIZE bytes
+        repeat         - int , times to repeat every phase, the best is kept
+        method         - str , how to build the NFA, see nfa.NFiniteAutomata
+        simulate_limit - int , largest text to run simulate() on
+
+    Returns:
+        dict, seconds of every phase, automata sizes and simulation results
+    """
+    phases = {}
+    regex, phases['regex'] = timed(lambda: ere.Regex(pattern), repeat)
+    my_nfa, phases['nfa'] = timed(lambda: nfa.NFiniteAutomata(regex,
+                                                              method),
+                                  repeat)
+    my_dfa, phases['dfa'] = timed(lambda: dfa.DFiniteAutomata(regex), repeat)
+    min_dfa, phases['minimal'] = timed(my_dfa.minimalDFA, repeat)
+    matcher, phases['compile_dfa'] = timed(min_dfa.compile, repeat)
+
+    def compileNFA():
+        my_nfa.invalidate()     # Drop the kept closures and BitNFA
+        return my_nfa.bitNFA()
+
+    bits, phases['compile_nfa'] = timed(compileNFA, repeat)
+    result = {
+        'pattern': pattern,
+        'phases':  phases,
+        'sizes':   {'positions': len(regex.index),
+                    'nfa_states': len(bits.states),
+                    'dfa_states': len(my_dfa.states),
+                    'minimal_states': len(min_dfa.states),
+                    'classes': len(my_dfa.classes)},
+        'simulate': []
+    }
+    if profiling.enabled:
+        result['stats'] = dict([(name, obj.stats.asDict()) for name, obj in
+                                [('regex', regex), ('nfa', my_nfa),
+                                 ('dfa', my_dfa), ('minimal', min_dfa)]])
+    for size, chunks in texts:
+        accepted, dfa_seconds, dfa_fed = scan(matcher, chunks())
+        _, nfa_seconds, nfa_fed = scan(bits, chunks())
+        run = {'bytes': size, 'accepted': accepted,
+               'dfa': dfa_seconds, 'dfa_bytes': dfa_fed,
+               'nfa': nfa_seconds, 'nfa_bytes': nfa_fed}
+        if size <= simulate_limit:
+            text = b''.join(chunks())
+            _, run['simulate_dfa'] = timed(lambda: min_dfa.simulate(text))
+            _, run['simulate_nfa'] = timed(lambda: my_nfa.simulate(text))
+        result['simulate'].append(run)
+    return result
+
+def runWorkload(workload, sizes=None, corpus=(), repeat=1, method='thompson',
+                seed=0, simulate_limit=65536):
+    """Runs a workload for every size parameter.
+
+    Args:
+        workload       - Workload, the workload to run
+        sizes          - list, values of N, the workload's defaults if None
+        corpus         - list, text sizes in bytes to simulate on
+        repeat         - int , times to repeat every phase
+        method         - str , how to build the NFA
+        seed           - int , seed of the texts
+        simulate_limit - int , largest text to run simulate() on
+
+    Returns:
+        list, result of every N, see runPattern()
+    """
+    results = []
+    for n in workload.sizes if sizes is None else sizes:
+        texts = [(size, lambda size=size: workload.corpus(n, size, seed))
+                 for size in corpus]
+        result = runPattern(workload.pattern(n), texts, repeat, method,
+                            simulate_limit)
+        result['workload'], result['n'] = workload.name, n
+        results.append(result)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.run',
+        description='Times parsing, NFA / DFA construction, minimization '
+                    'and simulation of the benchmark workloads, and writes '
+                    'the results as JSON.')
+    parser.add_argument('-w', '--workload', action='append',
+                        choices=sorted(workloads.WORKLOADS),
+                        help='workload to run, may be repeated, all by '
+                             'default')
+    parser.add_argument('-n', '--sizes', type=lambda text:
+                        [int(n) for n in text.split(',')],
+                        help='comma separated size parameters, instead of '
+                             'the workload defaults')
+    parser.add_argument('-c', '--corpus', default='1K,64K,1M',
+                        help='comma separated text sizes to simulate on, '
+                             'with K / M / G suffixes (default: 1K,64K,1M)')
+    parser.add_argument('-r', '--repeat', type=int, default=1,
+                        help='times to repeat every phase, the best is kept')
+    parser.add_argument('-m', '--method', default='thompson',
+                        choices=['thompson', 'glushkov'],
+                        help='NFA construction method')
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    parser.add_argument('-l', '--simulate-limit', default='64K',
+                        help='largest text to also run simulate() on, with '
+                             'K / M / G suffixes (default: 64K)')
+    parser.add_argument('-p', '--profile', action='store_true',
+                        help='also record the construction statistics, see '
+                             'prefa.profiling')
+    parser.add_argument('-o', '--output',
+                        help='file to write the JSON to, stdout by default')
+    args = parser.parse_args(argv)
+
+    corpus = [parseSize(size) for size in args.corpus.split(',') if size]
+    if args.profile:
+        profiling.enable()
+    report = {
+        'meta':    {'prefa': prefa.__version__,
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'date': datetime.datetime.now().isoformat(),
+                    'method': args.method, 'repeat': args.repeat,
+                    'seed': args.seed, 'profile': args.profile,
+                    'simulate_limit': parseSize(args.simulate_limit)},
+        'results': []
+    }
+    for name in args.workload or sorted(workloads.WORKLOADS):
+        report['results'] += runWorkload(workloads.WORKLOADS[name],
+                                         args.sizes, corpus, args.repeat,
+                                         args.method, args.seed,
+                                         parseSize(args.simulate_limit))
+        print('done: ' + name, file=sys.stderr)
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=1)
+        print()
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+##############################################################################
+# Author: Jose, Robert & King                                                #
+#  Date:  2019.01.15                                                         #
+##############################################################################
+
+import random
+
+CHUNK_SIZE = 65536
+
+KEYWORDS = ['if', 'else', 'elif', 'while', 'for', 'in', 'def', 'class',
+            'return', 'yield', 'import', 'from', 'as', 'with', 'try',
+            'except', 'finally', 'raise', 'assert', 'pass', 'break',
+            'continue', 'lambda', 'global', 'nonlocal', 'del', 'not', 'and',
+            'or', 'is', 'None', 'True', 'False', 'async', 'await', 'print']
+
+# Token rules of a toy language and a sample text of each, so that a
+# corpus made of the samples is in the language of the rules.
+TOKEN_RULES = [
+    ('[a-zA-Z_][a-zA-Z0-9_]*',              ['foo', 'x_1', 'Bar', '_tmp']),
+    ('[0-9]+',                              ['0', '42', '1995']),
+    ('[0-9]+\\.[0-9]+([eE][-+]?[0-9]+)?',   ['3.14', '1.0e-9', '2.5E+3']),
+    ('0[xX][0-9a-fA-F]+',                   ['0xff', '0X1A2b']),
+    ('"[^"\\n]*"',                          ['"hi"', '"a b c"', '""']),
+    ('[-+*/%=<>!&|^]=?',                    ['+', '<=', '!=', '%']),
+    ('[(){}\\[\\],;:]',                     ['(', ')', '[', ';']),
+    ('[ \\t\\n]+',                          [' ', '\n', '\t ']),
+    ('\\#[^\\n]*\\n',                       ['# note\n', '#\n']),
+    ('\'([^\'\\\\]|\\\\[nt\'])*\'',         ["'c'", "'\\n'", "'ab'"])
+]
+
+class Workload(object):
+    """Family of patterns growing with a size parameter N, and the text
+    the patterns are run over.
+
+    Attributes:
+        name    - str     , name of the workload
+        sizes   - list    , default values of N
+        pattern - function, N -> the Regular Expression
+        sample  - function, (rng, N) -> a piece of text, so that any
+                            concatenation of pieces is accepted
+    """
+
+    def __init__(self, name, sizes, pattern, sample):
+        self.name, self.sizes = name, sizes
+        self.pattern, self.sample = pattern, sample
+
+    def corpus(self, n, size, seed=0):
+        """Generates a text of SIZE bytes in chunks, without holding it all.
+
+        A block of about CHUNK_SIZE bytes is made of samples once, and then
+        repeated, so that GB-sized texts cost no generation time to speak
+        of. The text may stop in the middle of a sample.
+
+        Args:
+            n    - int, the size parameter of the pattern
+            size - int, total length of the text in bytes
+            seed - int, seed of the random samples
+
+        Yields:
+            bytes, every chunk of the text
+        """
+        rng, pieces, length = random.Random(seed), [], 0
+        while length < CHUNK_SIZE:
+            piece = self.sample(rng, n)
+            pieces.append(piece)
+            length += len(piece)
+        block = ''.join(pieces).encode('latin-1')
+        while size > 0:
+            chunk = block[:size]
+            size -= len(chunk)
+            yield chunk
+
+def _keywords(n):
+    """Gets N distinct keywords, made up once the real ones run out."""
+    words = list(KEYWORDS[:n])
+    while len(words) < n:
+        k = len(words)
+        words.append(KEYWORDS[k % len(KEYWORDS)] + str(k // len(KEYWORDS)))
+    return words
+
+def _tokens(n):
+    """Gets the first N token rules, N up to len(TOKEN_RULES)."""
+    return TOKEN_RULES[:min(n, len(TOKEN_RULES))]
+
+WORKLOADS = dict([(workload.name, workload) for workload in [
+    # Ambiguous star, where Thompson NFAs keep many threads alive.
+    Workload('alt_star', [1, 2, 4, 8],
+             lambda n: '(' + '|'.join(['a' * k for k in range(1, n + 1)]) +
+                       ')*',
+             lambda rng, n: 'a'),
+    # Nested '+', where epsilon closures grow with the depth.
+    Workload('nested_plus', [2, 4, 8, 16],
+             lambda n: '(' * n + 'a' + ')+' * n,
+             lambda rng, n: 'a'),
+    # The classic exponential blowup, the DFA has 2^(N+1) states.
+    Workload('nth_from_end', [2, 4, 8, 12],
+             lambda n: '(a|b)*a(a|b){%d}' % n,
+             lambda rng, n: rng.choice('ab')),
+    # Keywords out of N of them, each followed by a space.
+    Workload('keywords', [8, 32, 128, 512],
+             lambda n: '((' + '|'.join(_keywords(n)) + ')\\x20)*',
+             lambda rng, n: rng.choice(_keywords(n)) + ' '),
+    # Any sequence of tokens of the first N rules.
+    Workload('tokens', [2, 4, 7, 10],
+             lambda n: '(' + '|'.join([rule for rule, _ in _tokens(n)]) +
+                       ')*',
+             lambda rng, n: rng.choice([sample for _, samples in _tokens(n)
+                                        for sample in samples]))
+]])
+
+if __name__ == '__main__':
+    for name in sorted(WORKLOADS):
+        workload = WORKLOADS[name]
+        n = workload.sizes[1]
+        text = b''.join(workload.corpus(n, 40, seed=1))
+        print('%-14s %-40.40s %r' % (name, workload.pattern(n), text))
@@ -1,2 +1,5 @@
 # Presentation tool for Regular Expressions and Finite Automatas
-__all__ = ['bintree', 'ere', 'fa', 'nfa', 'dfa', 'pgui']
+__version__ = '2.3.4'
+__all__ = ['bintree', 'ere', 'fa', 'nfa', 'dfa', 'stream', 'parallel',
+           'search', 'lexer', 'regexset', 'store', 'cache', 'profiling',
+           'tables', 'pgui']
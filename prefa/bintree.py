@@ -87,20 +87,26 @@ class Node(object):
     current node and its descendants.
 
     Attributes:
-        value - char, symbol / operator on this node
-        left  - Node, left child
-        right - Node, right child
-        pos   - int , position number, only non-epsilon leaves get it,
-                      otherwise will be None
+        value    - char     , symbol / operator on this node
+        left     - Node     , left child
+        right    - Node     , right child
+        pos      - int      , position number, only non-epsilon leaves get
+                              it, otherwise will be None
+        nullable - bool     , can the sub-regex rooted here generate epsilon
+        firstpos - frozenset, positions that can come first here
+        lastpos  - frozenset, positions that can come last here
     """
 
     def __init__(self, value, left=None, right=None):
-        self.value   = value
-        self.visited = False
-        self.left    = left
-        self.right   = right
-        self.pos     = None   # Set as None at initialization, but will
-                              # receive a proper one when a Regex is built
+        self.value    = value
+        self.visited  = False
+        self.left     = left
+        self.right    = right
+        self.pos      = None    # Set as None at initialization, but will
+                                # receive a proper one when a Regex is built
+        self.nullable = None    # Position infos are left as None until
+        self.firstpos = None    # _calcPosInfo() is called on the tree
+        self.lastpos  = None
 
     def __str__(self):
         lines = _buildTreeString(self, 0)[0]
@@ -109,6 +115,24 @@ class Node(object):
     def __repr__(self):
         return 'Node({})'.format(self.value)
 
+    def _copy(self):
+        """Copies the subtree rooted, without position infos.
+
+        Returns:
+            Node, root of the new subtree
+        """
+        root = Node(self.value)
+        stack = [(self, root)]
+        while len(stack) > 0:
+            node, copy = stack.pop()
+            if node.left is not None:
+                copy.left = Node(node.left.value)
+                stack.append((node.left, copy.left))
+            if node.right is not None:
+                copy.right = Node(node.right.value)
+                stack.append((node.right, copy.right))
+        return root
+
     def _markLeafPos(self):
         """Marks leaf position numbers for subtree rooted.
 
@@ -140,6 +164,61 @@ class Node(object):
                     stack.append(node.left)
         return index
 
+    def _calcPosInfo(self):
+        """Calculates position infos for subtree rooted.
+
+        Considers the current NODE as root of a marked syntax tree, then
+        visits every node exactly once from bottom up, without recursion,
+        caching its NULLABLE, FIRSTPOS and LASTPOS. Followpos entries are
+        added in the same pass, whenever a '-', '*' or '+' node is finished.
+
+        Returns:
+            followpos - dict, pos-set table, every position gets an entry
+        """
+
+        # Collect nodes in pre-order, so that the reversed order always
+        # finishes both children before their parent.
+        order, stack = [], [self]
+        while len(stack) > 0:
+            node = stack.pop()
+            order.append(node)
+            if node.left is not None:
+                stack.append(node.left)
+            if node.right is not None:
+                stack.append(node.right)
+
+        followpos = {}
+        for node in reversed(order):
+            l, r = node.left, node.right
+            if node.value == '~':
+                node.nullable = True
+                node.firstpos = node.lastpos = frozenset()
+            elif l is None and r is None:
+                node.nullable = False
+                node.firstpos = node.lastpos = frozenset([node.pos])
+                followpos[node.pos] = set()
+            elif node.value == '*' or node.value == '+':
+                node.nullable = True if node.value == '*' else l.nullable
+                node.firstpos, node.lastpos = l.firstpos, l.lastpos
+                for i in l.lastpos:
+                    followpos[i] |= l.firstpos
+            elif node.value == '?':
+                node.nullable = True
+                node.firstpos, node.lastpos = l.firstpos, l.lastpos
+            elif node.value == '-':
+                node.nullable = l.nullable and r.nullable
+                node.firstpos = l.firstpos | r.firstpos if l.nullable \
+                                else l.firstpos
+                node.lastpos  = l.lastpos  | r.lastpos  if r.nullable \
+                                else r.lastpos
+                for i in l.lastpos:
+                    followpos[i] |= r.firstpos
+            elif node.value == '|':
+                node.nullable = l.nullable or r.nullable
+                node.firstpos = l.firstpos | r.firstpos
+                node.lastpos  = l.lastpos  | r.lastpos
+        return followpos
+
 if __name__ == '__main__':
     tree = Node('*')
     tree.left  = Node('+')
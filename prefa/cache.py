@@ -0,0 +1,110 @@
+##############################################################################
+# Author: Jose, Robert & King                                                #
+#  Date:  2019.01.15                                                         #
+##############################################################################
+
+from prefa import ere, nfa, dfa
+from collections import OrderedDict
+import threading
+# import ere, nfa, dfa
+
+# Compiled automata, most recently used last, guarded by _lock.
+_cache   = OrderedDict()
+_lock    = threading.Lock()
+_maxsize = 512
+_hits, _misses = 0, 0
+
+def _build(pattern, engine):
+    """Builds the automata of a pattern for an engine.
+
+    Args:
+        pattern - str or bytes, the Regular Expression
+        engine  - str, 'dfa' or 'nfa'
+
+    Returns:
+        CompiledDFA or BitNFA, the built automata
+    """
+    if engine == 'dfa':
+        return dfa.DFiniteAutomata(ere.Regex(pattern)).minimalDFA() \
+                  .compile()
+    elif engine == 'nfa':
+        return nfa.NFiniteAutomata(ere.Regex(pattern)).bitNFA()
+    raise ValueError('Unknown engine %r' % engine)
+
+def compile(pattern, engine='dfa'):
+    """Compiles a Regular Expression, with an LRU cache.
+
+    Engine 'dfa' gives the CompiledDFA of the minimal DFA, and engine 'nfa'
+    gives the BitNFA of the Thompson NFA. The same object is shared by every
+    caller and thread asking for the same pattern. Both are immutable, with
+    read-only tables. The only state that still grows after building is
+    the lazy search states of a CompiledDFA. Its searcher is only made at
+    the first search, under a lock, and guards those states with its own
+    lock, see search.Searcher.
+
+    Args:
+        pattern - str or bytes, the Regular Expression
+        engine  - str, 'dfa' or 'nfa'
+
+    Returns:
+        CompiledDFA or BitNFA, the compiled automata
+    """
+    global _hits, _misses
+    key = (pattern, engine)
+    with _lock:
+        compiled = _cache.get(key)
+        if compiled is not None:
+            _cache.move_to_end(key)
+            _hits += 1
+            return compiled
+        _misses += 1
+
+    # Build outside of the lock, so that a slow pattern does not block the
+    # others. If two threads race on one pattern, the first stored wins.
+    compiled = _build(pattern, engine)
+    with _lock:
+        if key in _cache:
+            return _cache[key]
+        if _maxsize > 0:
+            _cache[key] = compiled
+            while len(_cache) > _maxsize:
+                _cache.popitem(last=False)
+    return compiled
+
+def setCacheSize(maxsize):
+    """Sets the most number of automata kept, dropping the oldest ones.
+
+    Args:
+        maxsize - int, new cache size, 0 to disable caching
+    """
+    global _maxsize
+    with _lock:
+        _maxsize = maxsize
+        while len(_cache) > _maxsize:
+            _cache.popitem(last=False)
+
+def cacheInfo():
+    """Reports the cache statistics.
+
+    Returns:
+        dict, 'hits', 'misses', 'size' and 'maxsize' of the cache
+    """
+    with _lock:
+        return {'hits': _hits, 'misses': _misses, 'size': len(_cache),
+                'maxsize': _maxsize}
+
+def purge():
+    """Clears the cache and its statistics.
+    """
+    global _hits, _misses
+    with _lock:
+        _cache.clear()
+        _hits, _misses = 0, 0
+
+if __name__ == '__main__':
+    print(compile('[a-c]+b*|a').match('acbb'))
+    print(compile('[a-c]+b*|a').match('ad'))
+    print(compile('[a-c]+b*|a', engine='nfa').match('acbb'))
+    print(cacheInfo())
+    purge()
+    print(cacheInfo())
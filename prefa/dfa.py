@@ -3,174 +3,151 @@
 #  Date:  2019.01.15                                                         #
 ##############################################################################
 
-from prefa import fa, ere, nfa
-from copy import deepcopy
-# import fa, ere, nfa
+from prefa import bintree, fa, ere, nfa, profiling, tables
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping
+import threading
+# import bintree, fa, ere, nfa, profiling, tables
 
 class DFiniteAutomata(fa.FiniteAutomata):
     """Determinstic Finite Automata child class.
 
     Can be initilaized from a formatted source file or a Regular Expression,
-    or from an NFiniteAutomata. Representation structure is just like
-    FiniteAutomata parent class.
+    or from an NFiniteAutomata.
+
+    Transitions are kept in DELTA, a flat `array` of one int per state and
+    class of equivalent symbols, rather than a dict-of-dict-of-set. TABLE
+    is a read-only view of it in the form of FiniteAutomata tables, made
+    on the fly, so that FiniteAutomata methods and displaying still work.
+    ALPHABET, CLASSES and COLUMN_OF are immutable, and are shared with the
+    minimized DFA.
 
     Attributes:
-        initial    - str , the initial state
-        acceptings - set , set of accepting states
-        table      - dict, the transition table
-        alphabet   - list, alphabet in sorted order
-        states     - list, list of all states in sorted order
+        initial    - str  , the initial state
+        acceptings - set  , set of accepting states
+        table      - Mapping, read-only state-symbol-set view of DELTA
+        alphabet   - tuple, alphabet in sorted order
+        classes    - tuple, tuples of equivalent symbols, which always have
+                            the same transitions, see symbolClasses()
+        column_of  - dict , symbol-class index table
+        delta      - array, target state number of state number i on
+                            class j at i * len(CLASSES) + j, -1 if none
+        states     - list , list of all states, in state number order
+        stats      - Stats, construction counters, 'states_created' and
+                            'lookups' into DStates for subset constructions,
+                            and more if profiling, see prefa.profiling
     """
 
     def __init__(self, input):
+        self.stats = profiling.Stats('DFA')
         if type(input) == str:                   # 1. Input from source file
-            self._initFromFile(input)
+            with self.stats.phase('load'):
+                self._initFromFile(input)
         elif type(input) == nfa.NFiniteAutomata: # 2. Input from NFA convertion
             self._initFromNFA(input)
         else:                                    # 3. Input from a regex
             self._initFromRE(input)
+        if profiling.enabled:
+            self.stats['bytes_per_state'] = profiling.approxBytes(
+                [self.delta, self.states]) // max(len(self.states), 1)
+
+    @property
+    def table(self):
+        """Read-only view of DELTA as a FiniteAutomata table."""
+        view = self.__dict__.get('_table')
+        if view is None:
+            view = self.__dict__['_table'] = _TableView(self)
+        return view
+
+    def _setSymbols(self, alphabet, classes):
+        """Sets ALPHABET, CLASSES and COLUMN_OF.
+
+        Args:
+            alphabet - iterable, alphabet symbols, '~' being a normal one
+            classes  - iterable, tuples of equivalent symbols
+        """
+        self.alphabet = tuple(sorted(alphabet))
+        self.classes  = tuple(classes)
+        self.column_of = dict([(a, j) for j, group in enumerate(self.classes)
+                               for a in group])
+
+    def _initFromFile(self, input_file):
+        """Initializer for formatted source file.
+
+        Reads the file, text or binary, by tables.read() into a table of
+        one column per symbol, then merges equivalent columns into DELTA.
+
+        Args:
+            input_file - str, input source file name (/ path)
+
+        Raises:
+            ValueError, if the file is malformed, or a state moves to more
+                        than one state on some symbol
+        """
+        loaded = tables.read(input_file, deterministic=True)
+        n, k, alphabet = len(loaded.states), len(loaded.alphabet), \
+                         loaded.alphabet
+        full = array('l', [-1]) * (n * k)
+        for e in range(len(loaded.src)):
+            cell = loaded.src[e] * k + loaded.sym[e]
+            if full[cell] >= 0:     # Only binary files are not checked yet
+                raise ValueError('State %s moves to more than one state on %s'
+                                 % (loaded.states[loaded.src[e]],
+                                    alphabet[loaded.sym[e]]))
+            full[cell] = loaded.dst[e]
+        groups = {}
+        for j, a in enumerate(alphabet):
+            groups.setdefault(full[j::k].tobytes(), []).append(a)
+        self._setSymbols(alphabet, sorted([tuple(group) for group in
+                                           groups.values()]))
+        width = len(self.classes)
+        self.delta = array('l', [-1]) * (n * width)
+        for j, group in enumerate(self.classes):
+            self.delta[j::width] = full[alphabet.index(group[0])::k]
+        self.states = loaded.states
+        self.initial = self.states[loaded.initial] if loaded.initial >= 0 \
+                       else ''
+        self.acceptings = set([s for u, s in enumerate(self.states)
+                               if loaded.accepting[u] == 1])
 
     def _initFromRE(self, input_regex):
         """Initializer for a Regular Expression.
 
         Takes a Regular Expression, builds an DFA by utilizing position
-        numbers for non-epsilon leaves.
+        numbers for non-epsilon leaves. Moves are computed once per class of
+        equivalent symbols rather than once per symbol.
 
         Args:
             input_regex - str, input Regular Expression
         """
 
-        def nullable(node):
-            """Is sub-regex rooted at NODE nullable?
-
-            Args:
-                node - Node, current root node
-
-            Returns:
-                Bool, True iff nullable, else False
-            """
-            if node.value == '~' or node.value == '*':
-                return True
-            elif node.left is None and node.right is None:
-                return False
-            elif node.value == '-':
-                return nullable(node.left) and nullable(node.right)
-            elif node.value == '|':
-                return nullable(node.left) or  nullable(node.right)
-
-        def firstpos(node):
-            """Which positions can be first in sub-regex rooted at NODE?
-
-            Args:
-                node - Node, current root node
-
-            Returns:
-                set, set of firstpos on NODE
-            """
-            if node.value == '~':
-                return set()
-            elif node.left is None and node.right is None:
-                return {node.pos}
-            elif node.value == '*':
-                return firstpos(node.left)
-            elif node.value == '-':
-                if nullable(node.left):
-                    return firstpos(node.left) | firstpos(node.right)
-                return firstpos(node.left)
-            elif node.value == '|':
-                return firstpos(node.left) | firstpos(node.right)
-
-        def lastpos(node):
-            """Which positions can be last in sub-regex rooted at NODE?
-
-            Args:
-                node - Node, current root node
-
-            Returns:
-                set, set of lastpos on NODE
-            """
-            if node.value == '~':
-                return set()
-            elif node.left is None and node.right is None:
-                return {node.pos}
-            elif node.value == '*':
-                return lastpos(node.left)
-            elif node.value == '-':
-                if nullable(node.right):
-                    return lastpos(node.left) | lastpos(node.right)
-                return lastpos(node.right)
-            elif node.value == '|':
-                return lastpos(node.left) | lastpos(node.right)
-
-        # Do a DFS traverse from root node, calculate followpos table for
-        # every position number. FOLLOWPOS will be stored as a dict.
-        followpos = {}
-        stack = [input_regex.tree]
-        stack[-1].visited = False
-        while len(stack) > 0:
-            node = stack[-1]
-            if node.visited:
-                stack.pop()
-                if node.value == '-':
-                    for i in lastpos(node.left):
-                        if i in followpos:
-                            followpos[i] |= firstpos(node.right)
-                        else:
-                            followpos[i]  = firstpos(node.right)
-                elif node.value == '*':
-                    for i in lastpos(node.left):
-                        if i in followpos:
-                            followpos[i] |= firstpos(node.left)
-                        else:
-                            followpos[i]  = firstpos(node.left)
-            else:
-                if node.right is not None:
-                    stack.append(node.right)
-                    node.right.visited = False
-                if node.left is not None:
-                    stack.append(node.left)
-                    node.left.visited  = False
-                node.visited = True
-
-        # Set and initialize the fields to prepare for construction.
-        S0 = firstpos(input_regex.tree)
-        DStates, marker, namer = [('S0', S0)], 0, 0
-        self.alphabet = deepcopy(input_regex.alphabet)
-        if '~' in self.alphabet:
-            self.alphabet.remove('~')
-        self.table = {}
-        self.states = []
+        # Calculate nullable, firstpos, lastpos of every node and followpos
+        # of every position number in one bottom-up pass over the tree.
+        # FOLLOWPOS will be stored as a dict.
+        with self.stats.phase('followpos'):
+            followpos = input_regex.tree._calcPosInfo()
+
+        # Set and initialize the fields to prepare for construction, then
+        # build the transition table from FOLLOWPOS infos, see
+        # _positionSubsets(). A DFA state is accepting iff it contains the
+        # position of the end symbol '#'.
+        self._setSymbols([a for a in input_regex.alphabet if a != '~'],
+                         ere.symbolClasses(input_regex.atoms))
         self.initial, self.acceptings = 'S0', set()
+        columns_of = dict([(sym, set([self.column_of[a] for a in atoms]))
+                           for sym, atoms in input_regex.atoms.items()])
+        ends = set([pos for pos, a in input_regex.index.items() if a == '#'])
 
-        # Iteratively construct the transition table from FOLLOWPOS infos.
-        # Here, DFA state "U" is the set of several position numbers, and
-        # "name_U" is the actual name to be stored in transtion table for
-        # this DFA state U.
-        while (marker < len(DStates)):
-            name_U, U = DStates[marker]
-            self.table[name_U] = dict([(a, set()) for a in self.alphabet])
-            self.states.append(name_U)
-            if '#' in [input_regex.index[i] for i in U]:    # True iff U is
-                self.acceptings.add(name_U)                 # accepting
-            for a in self.alphabet:
-                V = set()
-                for pos in U:
-                    if pos not in followpos:
-                        followpos[pos] = set()
-                    if input_regex.index[pos] == a:
-                        V |= followpos[pos]
-                if len(V) > 0:
-                    name_V = None
-                    for tup in DStates:     # Falls in iff V is in DStates
-                        if len(tup[1] ^ V) == 0:
-                            name_V = tup[0]
-                            break
-                    if name_V is None:      # True iff V is not in DStates
-                        namer += 1
-                        name_V = 'S' + str(namer)
-                        DStates.append((name_V, V))
-                    self.table[name_U][a] = {name_V}
-            marker += 1
+        def onState(u, found):
+            if len(found) > 0:
+                self.acceptings.add('S' + str(u))
+
+        self.delta, n = _positionSubsets(input_regex.tree.firstpos, followpos,
+                                         input_regex.index, columns_of,
+                                         len(self.classes), ends, onState,
+                                         self.stats)
+        self.states = ['S' + str(u) for u in range(n)]
 
     def _initFromNFA(self, input_nfa):
         """Initializer for an NFiniteAutomata.
@@ -182,116 +159,843 @@ class DFiniteAutomata(fa.FiniteAutomata):
             input_nfa - NFiniteAutomata, NFA to convert from
         """
             
-        # Set and initialize the fields to prepare for construction. Entirely
-        # copies the input NFA to avoid modifications on it.
-        S0 = input_nfa.epsClosure(input_nfa.initial)
-        DStates, marker, namer = [('S0', S0)], 0, 0
-        self.table = {}
-        self.states = []
-        self.alphabet = deepcopy(input_nfa.alphabet)
-        if '~' in self.alphabet:
-            self.alphabet.remove('~')
+        # Set and initialize the fields to prepare for construction. Works
+        # on the bit-parallel representation of INPUT_NFA, so that a subset
+        # is an int mask and DSTATES maps every discovered mask to its name.
+        with self.stats.phase('bitnfa'):
+            bits = input_nfa.bitNFA()
+        S0 = bits.initial
+        DStates, unmarked = {S0: 0}, [S0]
+        alphabet = input_nfa.inputSymbols()
+        self._setSymbols(alphabet, input_nfa.symbolClasses(alphabet))
+        self.states, self.delta = [], array('l')
         self.initial, self.acceptings = 'S0', set()
+        self.stats['states_created'], self.stats['lookups'] = 1, 0
+        no_moves = array('l', [-1]) * len(self.classes)
 
         # Iteratively construct the transition table from INPUT_NFA infos.
-        # Here, DFA state "U" is the set of several INPUT_NFA states, and
-        # "name_U" is the actual name to be stored in transtion table for
-        # this DFA state U.
-        while (marker < len(DStates)):
-            name_U, U = DStates[marker]
-            self.table[name_U] = dict([(a, set()) for a in self.alphabet])
+        # Here, DFA state "U" is the mask of several INPUT_NFA states, and
+        # its state number is its index in UNMARKED, named 'S' + number.
+        clock, profile = self.stats.start('subset'), profiling.enabled
+        marker = 0
+        while (marker < len(unmarked)):
+            U, name_U = unmarked[marker], 'S' + str(marker)
             self.states.append(name_U)
-            if len(U & input_nfa.acceptings) > 0:   # True iff U is accepting
+            self.delta.extend(no_moves)
+            base = marker * len(self.classes)
+            if profile:
+                self.stats.count('moves', len(self.classes))
+                self.stats.peak('peak_subset', bin(U).count('1'))
+            if U & bits.accept != 0:    # True iff U is accepting
                 self.acceptings.add(name_U)
-            for a in self.alphabet:
-                V = input_nfa.epsClosure(input_nfa.move(U, a))
-                if len(V) > 0:
-                    name_V = None
-                    for tup in DStates:     # Falls in iff V is in DStates
-                        if len(tup[1] ^ V) == 0:
-                            name_V = tup[0]
-                            break
-                    if name_V is None:      # True iff V is not in DStates
-                        namer += 1
-                        name_V = 'S' + str(namer)
-                        DStates.append((name_V, V))
-                    self.table[name_U][a] = {name_V}
+            for k, group in enumerate(self.classes):
+                V = bits.step(U, group[0])
+                if V != 0:
+                    self.stats['lookups'] += 1
+                    v = DStates.get(V)
+                    if v is None:           # True iff V is not in DStates
+                        v = DStates[V] = len(unmarked)
+                        unmarked.append(V)
+                        self.stats['states_created'] += 1
+                    self.delta[base + k] = v
             marker += 1
+        self.stats.stop('subset', clock)
+
+    def epsClosure(self, S):
+        """Calculates the epsilon closure, which is S itself, as a DFA has
+        no epsilon moves ('~' being a normal symbol here).
+
+        Args:
+            S - set or str, states to calculate closure on
+
+        Returns:
+            closure - set, the epsilon closure of S
+        """
+        return {S} if type(S) == str else S
 
     def minimalDFA(self):
         """DFA minimization.
 
         Produces a minimized DFA which is equivalent to the original one, by
-        the method of group partitioning. Will return a minimized copy
-        instead of modifying itself.
+        Hopcroft's partition refinement over an inverse transition index.
+        Unreachable states and dead states (those which can never reach an
+        accepting state) are dropped up front. States of the minimized DFA
+        are named in BFS order from the initial state. Works on DELTA, i.e.
+        on classes of equivalent symbols. Will return a new minimized DFA
+        instead of modifying itself, which shares ALPHABET, CLASSES and
+        COLUMN_OF with this one rather than copying them.
 
         Returns:
             DFiniteAutomata, which is the minimized one.
         """
 
-        # Make a deep copy of self.
-        min_dfa = deepcopy(self)
-        min_dfa.alphabet = deepcopy(self.alphabet)
-
-        # Conduct minimization by repeatedly partitioning the state groups.
-        # Initially there are two groups, one containing all accepting
-        # states and another containing all other states. Then, iterate over
-        # all the groups and split that group into smaller ones according to
-        # their transtions.
-        partition = [min_dfa.acceptings,
-                     set(min_dfa.states)-min_dfa.acceptings]
-        while True:
-            change_flag = False
-            new_partition = []
-            for group in partition:
-                dest = dict([(s, dict([(a, min_dfa.move(s, a))
-                       for a in min_dfa.alphabet])) for s in group])
-                same = dict([(s, dict([(s, True)
-                       for s in group])) for s in group])
-                marked = dict([(s, False) for s in group])
-                for s1 in group:        # Pass 1, judge whether in same group
-                    for s2 in group:    # for every pair of states in group.
-                        for a in min_dfa.alphabet:
-                            for check_group in partition:
-                                if len(dest[s1][a] & check_group) != \
-                                   len(dest[s2][a] & check_group):
-                                    same[s1][s2] = False
-                                    change_flag = True
-                                    break
-                for s1 in group:        # Pass 2, extract sub-groups and then
-                    if not marked[s1]:  # add into the new partition.
-                        new_group = set()
-                        for s2 in group:
-                            if not marked[s2] and same[s1][s2]:
-                                marked[s2] = True
-                                new_group.add(s2)
-                        new_partition.append(new_group)
-            partition = new_partition
-            if not change_flag:
-                break
-
-        # Generate updated transtion table and states information for the
-        # minimized DFA, then return this minimized copy.
-        state_dict, count = {}, 0
-        for S in partition:
-            state_dict['S'+str(count)] = S
-            count += 1
-        min_dfa.acceptings, min_dfa.states = set(), []
-        for s in state_dict:
-            min_dfa.table[s] = dict([(a, set()) for a in self.alphabet])
-            if self.initial in state_dict[s]:
-                min_dfa.initial = s
-            if len(self.acceptings & state_dict[s]) > 0:
-                min_dfa.acceptings.add(s)
-            for a in self.alphabet:
-                for s_end in state_dict:
-                    if len(self.table[list(state_dict[s])[0]][a] & \
-                       state_dict[s_end]) > 0:
-                        min_dfa.table[s][a] = {s_end}
-                        break
-        min_dfa.states = sorted(list(state_dict.keys()))
+        # Number the live states, i.e. those reachable from the initial
+        # state that can also reach an accepting state. State N stands for
+        # the dead sink, which makes the numbered DFA complete.
+        stats = profiling.Stats('DFA')
+        clock = stats.start('minimize')
+        n, k, old_delta = len(self.states), len(self.classes), self.delta
+        initial = self.states.index(self.initial) \
+                  if self.initial in self.states else -1
+        reachable, stack = bytearray(n), []
+        if initial >= 0:
+            reachable[initial] = 1
+            stack.append(initial)
+        while len(stack) > 0:
+            u = stack.pop()
+            for v in old_delta[u * k:(u + 1) * k]:
+                if v >= 0 and not reachable[v]:
+                    reachable[v] = 1
+                    stack.append(v)
+        inverse = [[] for _ in range(n)]
+        for u in range(n):
+            if reachable[u]:
+                for v in old_delta[u * k:(u + 1) * k]:
+                    if v >= 0:
+                        inverse[v].append(u)
+        live, stack = bytearray(n), []
+        for u, s in enumerate(self.states):
+            if reachable[u] and s in self.acceptings:
+                live[u] = 1
+                stack.append(u)
+        while len(stack) > 0:
+            v = stack.pop()
+            for u in inverse[v]:
+                if not live[u]:
+                    live[u] = 1
+                    stack.append(u)
+        live_states = [u for u in range(n) if live[u]]
+        number = dict([(u, i) for i, u in enumerate(live_states)])
+        sink = len(live_states)
+        delta = [[sink] * k for _ in range(sink + 1)]
+        for u in live_states:
+            for j, v in enumerate(old_delta[u * k:(u + 1) * k]):
+                if v in number:
+                    delta[number[u]][j] = number[v]
+
+        # Build the inverse transition index, INV[j][t] listing all states
+        # that go to state t on the j-th class.
+        inv = [[[] for _ in range(sink + 1)] for _ in range(k)]
+        for u in range(sink + 1):
+            for j in range(k):
+                inv[j][delta[u][j]].append(u)
+
+        # Hopcroft's refinement. Starts from the accepting / non-accepting
+        # partition, then splits every block by its preimages under each
+        # class. Only the smaller half of a split block needs to become a
+        # new splitter unless the block is already waiting.
+        finals = set([number[u] for u in live_states
+                      if self.states[u] in self.acceptings])
+        blocks = [b for b in (set(finals), set(range(sink + 1)) - finals)
+                  if len(b) > 0]
+        block_of = [0] * (sink + 1)
+        for b, block in enumerate(blocks):
+            for u in block:
+                block_of[u] = b
+        waiting, rounds = set(range(len(blocks))), 0
+        while len(waiting) > 0:
+            splitter = list(blocks[waiting.pop()])
+            rounds += 1
+            for j in range(k):
+                touched = {}
+                for t in splitter:
+                    for u in inv[j][t]:
+                        touched.setdefault(block_of[u], []).append(u)
+                for b, inside in touched.items():
+                    if len(inside) == len(blocks[b]):
+                        continue
+                    new_block = set(inside)
+                    blocks[b] -= new_block
+                    if len(new_block) > len(blocks[b]):
+                        blocks[b], new_block = new_block, blocks[b]
+                    new_b = len(blocks)
+                    blocks.append(new_block)
+                    for u in new_block:
+                        block_of[u] = new_b
+                    waiting.add(new_b)
+
+        # Name the blocks in BFS order from the initial block, skipping the
+        # sink's block, and emit the minimized DFA as a fresh object.
+        min_dfa = DFiniteAutomata.__new__(DFiniteAutomata)
+        min_dfa.alphabet, min_dfa.classes, min_dfa.column_of = \
+            self.alphabet, self.classes, self.column_of
+        min_dfa.stats = stats
+        min_dfa.states, min_dfa.delta = [], array('l')
+        min_dfa.initial, min_dfa.acceptings = 'S0', set()
+        sink_b = block_of[sink]
+        init_b = block_of[number[initial]] if initial in number else sink_b
+        position, order = {init_b: 0}, [init_b]
+        for b in order:
+            if b == sink_b:
+                continue
+            for j in range(k):
+                b_end = block_of[delta[next(iter(blocks[b]))][j]]
+                if b_end not in position and b_end != sink_b:
+                    position[b_end] = len(order)
+                    order.append(b_end)
+        no_moves = array('l', [-1]) * k
+        for i, b in enumerate(order):
+            name = 'S' + str(i)
+            min_dfa.states.append(name)
+            min_dfa.delta.extend(no_moves)
+            if b == sink_b:
+                continue
+            rep = next(iter(blocks[b]))
+            if rep in finals:
+                min_dfa.acceptings.add(name)
+            for j in range(k):
+                b_end = block_of[delta[rep][j]]
+                if b_end != sink_b:
+                    min_dfa.delta[i * k + j] = position[b_end]
+        stats.stop('minimize', clock)
+        if profiling.enabled:
+            stats['refinement_rounds'] = rounds
+            stats['bytes_per_state'] = profiling.approxBytes(
+                [min_dfa.delta, min_dfa.states]) // max(len(min_dfa.states), 1)
         return min_dfa
 
+    def compile(self):
+        """Compiles the DFA into an integer-indexed matcher.
+
+        Keeps the state numbers 0..N-1 and class columns of DELTA, adding
+        one column for symbols outside the alphabet. Empty cells go to an
+        extra dead state N, which is also where those symbols lead to.
+
+        Returns:
+            CompiledDFA, the immutable matcher of this DFA.
+        """
+        clock = self.stats.start('compile')
+        dead, k = len(self.states), len(self.classes)
+        width, delta = k + 1, self.delta
+        table = array('l', [dead]) * ((dead + 1) * width)
+        for u in range(dead):
+            for j in range(k):
+                v = delta[u * k + j]
+                if v >= 0:
+                    table[u * width + j] = v
+        accepting = bytearray(dead + 1)
+        for u, s in enumerate(self.states):
+            if s in self.acceptings:
+                accepting[u] = 1
+        initial = self.states.index(self.initial) \
+                  if self.initial in self.states else dead
+        compiled = CompiledDFA(tuple(self.states), self.classes, table,
+                               initial, bytes(accepting))
+        self.stats.stop('compile', clock)
+        if profiling.enabled:
+            self.stats['compiled_bytes_per_state'] = table.itemsize * width
+        return compiled
+
+def _positionSubsets(firstpos, followpos, index, columns_of, width, ends,
+                     onState, stats):
+    """Builds a DFA transition table from FOLLOWPOS infos.
+
+    A DFA state "U" is a set of position numbers, and its state number is
+    the order it is discovered in, starting from FIRSTPOS as state 0.
+    DSTATES maps every discovered position set, as a frozenset, to its
+    number, so that looking up a set is a single hash probe. Moves are
+    computed once per class column rather than once per symbol.
+
+    Args:
+        firstpos   - frozenset, positions of the initial state
+        followpos  - dict     , followpos of every position number
+        index      - dict     , pos-symbol table
+        columns_of - dict     , symbol-class columns table of every symbol
+                                but '#'
+        width      - int      , number of class columns
+        ends       - set      , positions of end symbols '#', which have no
+                                moves
+        onState    - callable , called as onState(number, found) for every
+                                state in order, FOUND being the list of the
+                                end positions in it
+        stats      - Stats    , takes the 'subset' phase, 'states_created'
+                                and 'lookups' counters, and 'peak_subset' if
+                                profiling
+
+    Returns:
+        (delta, n) - tuple, the flat transitions, WIDTH per state and -1 for
+                            no move, and the number of states
+    """
+    DStates, unmarked = {firstpos: 0}, [firstpos]
+    delta, no_moves = array('l'), array('l', [-1]) * width
+    stats['states_created'], stats['lookups'] = 1, 0
+    clock, profile = stats.start('subset'), profiling.enabled
+    marker = 0
+    while (marker < len(unmarked)):
+        U = unmarked[marker]
+        delta.extend(no_moves)
+        base = marker * width
+        moves, found = {}, []   # Gather followpos of U grouped by class
+        for pos in U:
+            if pos in ends:
+                found.append(pos)
+                continue
+            for k in columns_of[index[pos]]:
+                moves.setdefault(k, set()).update(followpos[pos])
+        onState(marker, found)
+        for k in sorted(moves):
+            if len(moves[k]) > 0:
+                V = frozenset(moves[k])
+                stats['lookups'] += 1
+                v = DStates.get(V)
+                if v is None:           # True iff V is not in DStates
+                    v = DStates[V] = len(unmarked)
+                    unmarked.append(V)
+                    stats['states_created'] += 1
+                    if profile:
+                        stats.peak('peak_subset', len(V))
+                delta[base + k] = v
+        marker += 1
+    stats.stop('subset', clock)
+    return delta, len(unmarked)
+
+def compileUnion(regexes):
+    """Compiles several Regular Expressions into one tagged DFA.
+
+    Joins copies of the syntax trees under '|' nodes, keeping the end
+    symbol '#' of every tree, then marks positions and builds the DFA from
+    followpos by _positionSubsets(), just like DFiniteAutomata does. A DFA
+    state is accepting iff it contains any '#' position, and its tag has
+    the i-th bit set iff it contains the '#' of the i-th regex, i.e. the
+    i-th regex accepts there. The given Regex instances are left untouched.
+
+    Args:
+        regexes - list, Regex instances to join
+
+    Returns:
+        (matcher, tags) - tuple, the CompiledDFA, and the tag (int) of
+                                 every state number
+    """
+    trees = [regex.tree._copy() for regex in regexes]
+    root = trees[0]
+    for tree in trees[1:]:
+        root = bintree.Node('|', root, tree)
+    index = root._markLeafPos()
+    followpos = root._calcPosInfo()
+    marker_of = {}
+    for i, tree in enumerate(trees):
+        marker_of[(tree.right if tree.value == '-' else tree).pos] = i
+    atoms = ere.splitAlphabet(set([a for regex in regexes
+                                   for a in regex.atoms]))[1]
+    classes = ere.symbolClasses(atoms)
+    class_of = dict([(a, j) for j, group in enumerate(classes)
+                     for a in group])
+    columns_of = dict([(sym, set([class_of[a] for a in atoms[sym]]))
+                       for sym in atoms])
+    tags = []
+
+    def onState(u, found):
+        tag = 0
+        for pos in found:
+            tag |= 1 << marker_of[pos]
+        tags.append(tag)
+
+    k = len(classes)
+    delta, dead = _positionSubsets(root.firstpos, followpos, index,
+                                   columns_of, k, marker_of, onState,
+                                   profiling.Stats('compileUnion'))
+    width = k + 1
+    table = array('l', [dead]) * ((dead + 1) * width)
+    for u in range(dead):
+        for j in range(k):
+            v = delta[u * k + j]
+            if v >= 0:
+                table[u * width + j] = v
+    accepting = bytes([1 if tag != 0 else 0 for tag in tags] + [0])
+    matcher = CompiledDFA(tuple(['S' + str(u) for u in range(dead)]),
+                          tuple(classes), table, 0, accepting)
+    return matcher, tuple(tags + [0])
+
+class _Columns(dict):
+    """Char-column table which finds the interval symbol of a char on its
+    first lookup, and gives the out-of-alphabet column for any unknown char,
+    so that it can be indexed just like BYTE_COLUMNS.
+    """
+
+    def __init__(self, classes):
+        self.column_of = dict([(a, j) for j, group in enumerate(classes)
+                               for a in group])
+        super(_Columns, self).__init__([(a, j) for a, j in
+                                        self.column_of.items()
+                                        if len(a) == 1])
+        self.symbol_of = fa.SymbolMap(list(self.column_of))
+        self.other = len(classes)
+
+    def __missing__(self, c):
+        a = self.symbol_of[c]
+        column = self.column_of[a] if a is not None else self.other
+        if len(self) < fa.SymbolMap.capacity:
+            self[c] = column
+        return column
+
+class _TableView(Mapping):
+    """Read-only state-row table over the DELTA of a DFiniteAutomata."""
+
+    __slots__ = ('dfa', 'number')
+
+    def __init__(self, dfa):
+        self.dfa = dfa
+        self.number = dict([(s, u) for u, s in enumerate(dfa.states)])
+
+    def __getitem__(self, s):
+        return _RowView(self.dfa, self.number[s] * len(self.dfa.classes))
+
+    def __iter__(self):
+        return iter(self.dfa.states)
+
+    def __len__(self):
+        return len(self.dfa.states)
+
+class _RowView(Mapping):
+    """Read-only symbol-set row of a state, see _TableView."""
+
+    __slots__ = ('dfa', 'base')
+
+    def __init__(self, dfa, base):
+        self.dfa, self.base = dfa, base
+
+    def __getitem__(self, a):
+        v = self.dfa.delta[self.base + self.dfa.column_of[a]]
+        return {self.dfa.states[v]} if v >= 0 else set()
+
+    def __iter__(self):
+        return iter(self.dfa.alphabet)
+
+    def __len__(self):
+        return len(self.dfa.alphabet)
+
+# Guards the lazy creation of CompiledDFA searchers.
+_searcher_lock = threading.Lock()
+
+class CompiledDFA(object):
+    """Immutable matcher compiled from a DFiniteAutomata.
+
+    States are numbered 0..N-1 and every class of equivalent symbols is
+    mapped to a column index, so that a step of simulation is a single
+    lookup into a flat transition table, which is only as wide as the number
+    of classes. Row N is a dead state looping on itself, and the last column
+    is taken by any symbol out of the alphabet, which always leads to the
+    dead state. The table is laid out as:
+
+        table[state * width + column] = next state
+
+    Besides str input, bytes-like input is also accepted without copying,
+    where every byte is read as the Latin-1 char of the same value.
+
+    The table and the accepting flags are kept as read-only memoryviews,
+    and no field can be reassigned, so that a matcher can be shared.
+
+    Attributes:
+        states       - tuple, state names, indexed by state number
+        classes      - tuple, tuples of equivalent symbols, indexed by column
+                              number
+        alphabet     - tuple, all symbols in sorted order
+        columns      - dict , char-column table
+        byte_columns - tuple, column of every byte value 0..255
+        table        - memoryview, read-only flat transition table of
+                                   (N+1) * width entries
+        initial      - int  , the initial state number
+        accepting    - memoryview, read-only accepting flag of every state
+                                   number
+        dead         - int  , the dead state number, which equals N
+        width        - int  , number of columns, equals len(classes) + 1
+    """
+
+    __slots__ = ('states', 'classes', 'alphabet', 'columns', 'byte_columns',
+                 'table', 'initial', 'accepting', 'dead', 'width',
+                 '_searcher')
+
+    def __init__(self, states, classes, table, initial, accepting):
+        set_field = super(CompiledDFA, self).__setattr__
+        columns = _Columns(classes)
+        set_field('states',       states)
+        set_field('classes',      classes)
+        set_field('alphabet',     tuple(sorted(columns.column_of)))
+        set_field('columns',      columns)
+        set_field('byte_columns', tuple([columns[chr(b)]
+                                         for b in range(256)]))
+        set_field('table',        memoryview(table).toreadonly())
+        set_field('initial',      initial)
+        set_field('accepting',    memoryview(accepting).toreadonly())
+        set_field('dead',         len(states))
+        set_field('width',        len(classes) + 1)
+        set_field('_searcher',    None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('CompiledDFA is immutable')
+
+    def __reduce__(self):
+        return (CompiledDFA, (self.states, self.classes,
+                              array('l', self.table), self.initial,
+                              bytes(self.accepting)))
+
+    def __repr__(self):
+        return 'CompiledDFA(states={}, alphabet={})'.format(
+               len(self.states), ''.join(self.alphabet))
+
+    def step(self, state, c):
+        """Performs a single transition.
+
+        Args:
+            state - int, state number to start from
+            c     - str, a char symbol
+
+        Returns:
+            int, the next state number, dead state if no transition
+        """
+        return self.table[state * self.width + self.columns[c]]
+
+    def advance(self, state, chunk):
+        """Runs through a chunk of input.
+
+        Does one table lookup per char, and stops as soon as the dead state
+        is reached, since it can never be left.
+
+        Args:
+            state - int      , state number to start from
+            chunk - str or bytes-like, input to run through
+
+        Returns:
+            state - int, the state number reached
+        """
+        table, width, dead = self.table, self.width, self.dead
+        if type(chunk) == str:
+            columns = self.columns
+            for c in chunk:
+                state = table[state * width + columns[c]]
+                if state == dead:
+                    break
+        else:
+            if type(chunk) != bytes and type(chunk) != bytearray:
+                chunk = memoryview(chunk).cast('B')
+            byte_columns = self.byte_columns
+            for b in chunk:
+                state = table[state * width + byte_columns[b]]
+                if state == dead:
+                    break
+        return state
+
+    def indexable(self, text):
+        """Gets an indexable view of TEXT and its symbol-column lookup.
+
+        A str is used as it is, while a bytes-like object is viewed as
+        unsigned bytes without copying. Either way, LOOKUP[VIEW[i]] is the
+        column of the i-th symbol.
+
+        Args:
+            text - str or bytes-like, the text to view
+
+        Returns:
+            (view, lookup) - tuple
+        """
+        if type(text) == str:
+            return text, self.columns
+        view = memoryview(text)
+        if view.format != 'B' or view.ndim != 1:
+            view = view.cast('B')
+        return view, self.byte_columns
+
+    def isAccepting(self, state):
+        """Is STATE accepting?
+
+        Args:
+            state - int, a state number
+
+        Returns:
+            Bool, True iff STATE is accepting
+        """
+        return self.accepting[state] == 1
+
+    def isDead(self, state):
+        """Is STATE the dead sink, i.e. state N?
+
+        Other trap states, which a DFA that is not minimized may have, are
+        not told apart from live ones.
+
+        Args:
+            state - int, a state number
+
+        Returns:
+            Bool, True iff STATE is the dead sink
+        """
+        return state == self.dead
+
+    def match(self, input_str):
+        """Checks whether the whole string is accepted.
+
+        Produces no trace, see `simulate()` for that.
+
+        Args:
+            input_str - str or bytes-like, the string to check
+
+        Returns:
+            Bool, True if accepted, False otherwise.
+        """
+        return self.accepting[self.advance(self.initial, input_str)] == 1
+
+    def reverse(self):
+        """Builds the DFA of the reversed language.
+
+        Reverses every transition, then determinizes from the set of all
+        accepting states by subset construction. A subset is accepting iff
+        it contains the initial state.
+
+        Returns:
+            CompiledDFA, the matcher of the reversed language.
+        """
+        n, k = self.dead, self.width - 1
+        inverse = [[[] for _ in range(n)] for _ in range(k)]
+        for u in range(n):
+            for j in range(k):
+                v = self.table[u * self.width + j]
+                if v != n:
+                    inverse[j][v].append(u)
+        S0 = frozenset([u for u in range(n) if self.accepting[u] == 1])
+        DStates, unmarked, rows = {}, [], []
+        if len(S0) > 0:
+            DStates[S0] = 0
+            unmarked.append(S0)
+        marker = 0
+        while marker < len(unmarked):
+            U, row = unmarked[marker], []
+            for j in range(k):
+                V = set()
+                for v in U:
+                    V.update(inverse[j][v])
+                V = frozenset(V)
+                if len(V) == 0:
+                    row.append(-1)
+                    continue
+                if V not in DStates:
+                    DStates[V] = len(unmarked)
+                    unmarked.append(V)
+                row.append(DStates[V])
+            rows.append(row)
+            marker += 1
+        dead, width = len(unmarked), self.width
+        table = array('l', [dead]) * ((dead + 1) * width)
+        accepting = bytearray(dead + 1)
+        for i, U in enumerate(unmarked):
+            for j, v in enumerate(rows[i]):
+                if v >= 0:
+                    table[i * width + j] = v
+            if self.initial in U:
+                accepting[i] = 1
+        return CompiledDFA(tuple(['R' + str(i) for i in range(dead)]),
+                           self.classes, table, 0, bytes(accepting))
+
+    def search(self, text, pos=0, endpos=None):
+        """Finds the leftmost-longest match in a text.
+
+        See search.Searcher for how it works.
+
+        Args:
+            text   - str or bytes-like, the text to search
+            pos    - int, where the search starts
+            endpos - int, where the search ends, end of TEXT by default
+
+        Returns:
+            (start, end) - tuple, span of the match, or None if no match
+        """
+        return self.searcher().search(text, pos, endpos)
+
+    def finditer(self, text, pos=0, endpos=None):
+        """Finds all non-overlapping leftmost-longest matches in a text.
+
+        Args:
+            text   - str or bytes-like, the text to search
+            pos    - int, where the search starts
+            endpos - int, where the search ends, end of TEXT by default
+
+        Returns:
+            iterator, of (start, end) spans of every match
+        """
+        return self.searcher().finditer(text, pos, endpos)
+
+    def searcher(self):
+        """Gets the searcher of this matcher, made at the first call.
+
+        Threads asking at the same time all get the same searcher.
+
+        Returns:
+            search.Searcher, the searcher.
+        """
+        if self._searcher is None:
+            with _searcher_lock:
+                if self._searcher is None:
+                    from prefa import search
+                    super(CompiledDFA, self).__setattr__(
+                        '_searcher', search.Searcher(self))
+        return self._searcher
+
+    def matchMany(self, strings, batch_size=65536):
+        """Checks many strings at once with NumPy.
+
+        Every batch of strings is encoded into one flat array of column
+        indices, and sorted by descending length, so that the strings still
+        running at any char position are always a prefix of them. Then all
+        strings advance together, by fancy indexing into the transition
+        table once per char position. States are kept premultiplied by
+        WIDTH, so that a step is a single take() from the flat table.
+        Requires NumPy.
+
+        Args:
+            strings    - iterable, all str or all bytes-like, to check
+            batch_size - int, number of strings to encode at a time
+
+        Returns:
+            result - numpy.ndarray, bool array of whether each is accepted
+
+        Raises:
+            TypeError, if STRINGS mixes str and bytes-like ones
+        """
+        import numpy as np
+
+        strings = list(strings)
+        result = np.zeros(len(strings), dtype=bool)
+        if len(strings) == 0:
+            return result
+        text = type(strings[0]) == str
+        for string in strings:
+            if (type(string) == str) != text:
+                raise TypeError('matchMany takes all str or all bytes-like '
+                                'strings')
+        trans = np.asarray(self.table, dtype=np.intp) * self.width
+        accepting = np.frombuffer(self.accepting, dtype=np.uint8) == 1
+        if text:                        # Code point intervals of columns,
+            bounds = [(-1, -1, self.width - 1)]     # after a sentinel
+            for j, group in enumerate(self.classes):
+                for a in group:
+                    if fa.symbolRange(a) is not None:
+                        first, last = fa.symbolRange(a)
+                        bounds.append((ord(first), ord(last), j))
+            bounds.sort()
+            starts = np.array([b[0] for b in bounds], dtype=np.int64)
+            ends = np.array([b[1] for b in bounds], dtype=np.int64)
+            columns = np.array([b[2] for b in bounds], dtype=np.intp)
+        else:
+            lookup = np.array(self.byte_columns, dtype=np.intp)
+
+        for start in range(0, len(strings), batch_size):
+            batch = strings[start:start+batch_size]
+            if text:
+                codes = np.frombuffer(''.join(batch).encode('utf-32-le',
+                                      'surrogatepass'), dtype=np.uint32)
+                k = np.searchsorted(starts, codes, side='right') - 1
+                cols = np.where(codes <= ends[k], columns[k], self.width - 1)
+            else:
+                codes = np.frombuffer(b''.join(batch), dtype=np.uint8)
+                cols = lookup[codes]
+            lengths = np.fromiter(map(len, batch), dtype=np.intp,
+                                  count=len(batch))
+            offsets = np.cumsum(lengths) - lengths
+            order = np.argsort(-lengths, kind='stable')
+            offsets, longest = offsets[order], int(lengths.max())
+            running = len(batch) - np.cumsum(np.bincount(lengths,
+                                                         minlength=longest))
+            state = np.full(len(batch), self.initial * self.width,
+                            dtype=np.intp)
+            for j in range(longest):
+                k = running[j]
+                state[:k] = trans.take(state[:k] + cols.take(offsets[:k] + j))
+            state //= self.width
+            result[start + order] = accepting[state]
+        return result
+
+class LazyDFA(object):
+    """DFA determinized on the fly from an NFiniteAutomata.
+
+    A subset state is only built when the input actually reaches it, using
+    the same move() and epsClosure() as NFA simulation, and each of its
+    transitions is only computed the first time it is taken. Determinized
+    states are kept in a cache of at most MAX_STATES entries. When the cache
+    is full, policy 'clear' drops all cached states and restarts from the
+    current one, while policy 'lru' evicts the least recently used state.
+
+    Attributes:
+        nfa        - NFiniteAutomata, the NFA to match with
+        max_states - int , cap on the number of cached states
+        policy     - str , eviction policy, 'clear' or 'lru'
+        cache      - OrderedDict, DFA state (frozenset) - transitions dict
+        initial    - frozenset, the initial DFA state
+        symbol_of  - SymbolMap, char-symbol table of the alphabet without
+                                epsilon
+        stats      - Stats, 'misses', 'evictions' and 'flushes' counters,
+                            and 'peak_subset' if profiling
+    """
+
+    def __init__(self, input_nfa, max_states=4096, policy='clear'):
+        if policy not in ('clear', 'lru'):
+            raise ValueError('Unknown eviction policy %r' % policy)
+        if max_states < 1:
+            raise ValueError('Cache must hold at least one state')
+        self.nfa, self.max_states, self.policy = input_nfa, max_states, policy
+        self.cache = OrderedDict()
+        self.initial = frozenset(input_nfa.epsClosure(input_nfa.initial))
+        self.symbol_of = fa.SymbolMap(input_nfa.inputSymbols())
+        self.stats = profiling.Stats('LazyDFA', {'misses': 0, 'evictions': 0,
+                                                 'flushes': 0})
+
+    def _row(self, U):
+        """Fetches the transitions dict of a DFA state.
+
+        Inserts an empty one if U is not cached yet, making room for it by
+        the eviction policy first.
+
+        Args:
+            U - frozenset, the DFA state
+
+        Returns:
+            row - dict, symbol-DFA state table of known transitions
+        """
+        row = self.cache.get(U)
+        if row is not None:
+            if self.policy == 'lru':
+                self.cache.move_to_end(U)
+            return row
+        if len(self.cache) >= self.max_states:
+            if self.policy == 'clear':
+                self.stats['evictions'] += len(self.cache)
+                self.stats['flushes'] += 1
+                self.cache.clear()
+            else:
+                self.cache.popitem(last=False)
+                self.stats['evictions'] += 1
+        row = self.cache[U] = {}
+        return row
+
+    def match(self, input_str):
+        """Checks whether the whole string is accepted.
+
+        Args:
+            input_str - str or bytes-like, the string to check, where every
+                        byte is read as the Latin-1 char of the same value
+
+        Returns:
+            Bool, True if accepted, False otherwise.
+        """
+        nfa, symbol_of = self.nfa, self.symbol_of
+        if type(input_str) != str:
+            input_str = map(chr, memoryview(input_str).cast('B'))
+        U = self.initial
+        row = self._row(U)
+        for c in input_str:
+            V = row.get(c)
+            if V is None:       # Transition not determinized yet
+                a = symbol_of[c]
+                if a is None:
+                    return False
+                self.stats['misses'] += 1
+                V = frozenset(nfa.epsClosure(nfa.move(U, a)))
+                row[c] = V
+                if profiling.enabled:
+                    self.stats.peak('peak_subset', len(V))
+            if len(V) == 0:
+                return False
+            U = V
+            row = self._row(U)
+        return len(U & nfa.acceptings) > 0
+
 if __name__ == '__main__':
     print(DFiniteAutomata('../input/DFA'))
     print(DFiniteAutomata(nfa.NFiniteAutomata('../input/NFA')))
@@ -304,3 +1008,11 @@ if __name__ == '__main__':
     print(min_dfa)
     print(min_dfa.simulate('aabbbaba', verbose=True))
     print(min_dfa.simulate('aaaabba'))
+
+    matcher = min_dfa.compile()
+    print(matcher)
+    print(matcher.match('aabbbaba'), matcher.match('aaaabba'))
+    print(matcher.matchMany(['aabbbaba', 'aaaabba', '', 'ba']))
+
+    lazy = LazyDFA(nfa.NFiniteAutomata(rexpr), max_states=2)
+    print(lazy.match('aabbbaba'), lazy.match('aaaabba'), lazy.stats)
@@ -3,177 +3,417 @@
 #  Date:  2019.01.15                                                         #
 ##############################################################################
 
-from prefa import bintree
-# import bintree
+from prefa import bintree, profiling
+import bisect
+# import bintree, profiling
+
+MAX_CHAR = 0x10FFFF
+MAX_BYTE = 0xFF
+ESCAPES  = {'n': '\n', 't': '\t', 'r': '\r', 'f': '\f', 'v': '\v'}
+
+class CharClass(tuple):
+    """Class of a set of chars, as in a range '[...]' of a RE.
+
+    A tuple of sorted, disjoint and non-adjacent (first, last) code point
+    intervals, so that equal sets are equal and hash the same. Prints as the
+    notation it was parsed from.
+
+    Attributes:
+        notation - str, the range notation in the RE
+    """
+
+    def __new__(cls, intervals, notation, negated=False, top=MAX_CHAR):
+        merged = []
+        for first, last in sorted(intervals):
+            if len(merged) > 0 and first <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+            else:
+                merged.append((first, last))
+        if negated:     # Take the complement within code points 0..TOP
+            gaps, first = [], 0
+            for lo, hi in merged:
+                if first < lo:
+                    gaps.append((first, lo - 1))
+                first = hi + 1
+            if first <= top:
+                gaps.append((first, top))
+            merged = gaps
+        char_class = super(CharClass, cls).__new__(cls, merged)
+        char_class.notation = notation
+        return char_class
+
+    def __getnewargs__(self):
+        return tuple(self), self.notation
+
+    def __str__(self):
+        return self.notation
+
+    def __repr__(self):
+        return 'CharClass({})'.format(self.notation)
+
+def splitAlphabet(symbols):
+    """Splits chars into disjoint intervals for the given leaf symbols.
+
+    Every leaf symbol, a single char or a CharClass, must be a union of
+    alphabet symbols. Chars are only cut where some leaf starts or ends, so
+    that e.g. '[a-z]' alone gives the single symbol 'a-z', while '[a-z]'
+    with 'e' gives 'a-d', 'e' and 'f-z'. An alphabet symbol is named as its
+    char if it has just one, otherwise as 'x-y' from its first char to its
+    last char. The single char '~' is named '~-~' instead, so that it is
+    never taken as epsilon.
+
+    Args:
+        symbols - iterable, leaf symbols, i.e. chars and CharClasses
+
+    Returns:
+        (alphabet, atoms) - tuple, alphabet in sorted order, and the
+                            table of leaf symbol-alphabet symbols pairs
+    """
+    intervals = {}
+    for sym in symbols:
+        intervals[sym] = sym if type(sym) == CharClass else \
+                         ((ord(sym), ord(sym)),)
+    cuts = set()
+    for sym in intervals:
+        for first, last in intervals[sym]:
+            cuts.add(first)
+            cuts.add(last + 1)
+    cuts = sorted(cuts)
+
+    # Every leaf covers consecutive pieces between cuts of each interval.
+    atoms, names = {}, {}
+    for sym in intervals:
+        pieces = []
+        for first, last in intervals[sym]:
+            k = bisect.bisect_left(cuts, first)
+            while cuts[k] <= last:
+                piece = (cuts[k], cuts[k+1] - 1)
+                if piece not in names:
+                    names[piece] = chr(piece[0]) + '-' + chr(piece[1]) \
+                                   if piece[0] != piece[1] or \
+                                      piece[0] == ord('~') \
+                                   else chr(piece[0])
+                pieces.append(names[piece])
+                k += 1
+        atoms[sym] = tuple(pieces)
+    return [names[piece] for piece in sorted(names)], atoms
+
+def symbolClasses(atoms):
+    """Groups alphabet symbols into equivalence classes for the given leaves.
+
+    Two symbols are equivalent iff every leaf either matches both or none
+    of them, so that they always lead to the same states in any automata
+    built from these leaves.
+
+    Args:
+        atoms - dict, table of leaf symbol-alphabet symbols pairs, as given
+                      by splitAlphabet()
+
+    Returns:
+        classes - list, tuples of equivalent symbols, in sorted order
+    """
+    leaves_of = {}
+    for k, sym in enumerate(atoms):
+        for a in atoms[sym]:
+            leaves_of.setdefault(a, []).append(k)
+    groups = {}
+    for a in sorted(leaves_of):
+        groups.setdefault(tuple(leaves_of[a]), []).append(a)
+    return sorted([tuple(group) for group in groups.values()])
 
 class Regex(object):
     """Class of a Regular Expression.
 
-    Only supports single-char symbols in alphabet! Concatenations are
+    Only supports single-char symbols in the RE! Concatenations are
     represented with '-'. End symbol '#' will be added in EXPR, but will not
     be in ALPHABET. Binary syntax tree will be generated and position numbers
     will be marked.
 
+    A range '[...]' is kept as a single leaf holding a CharClass. ALPHABET
+    is then made of the disjoint intervals the leaves split chars into, see
+    splitAlphabet(), so that it is only as large as the leaves need.
+
     Notice that '~' is regarded as epsilon here, and will not get a position
     number during the marking process. That also means we cannot use `~` as a
-    normal char symbol like 'a' / '0' in the input alphabet.
+    normal char symbol like 'a' / '0' in the input alphabet, unless escaped.
+
+    A backslash escapes the char after it, which is then always a normal
+    char symbol, even a keyword one, '~' or a whitespace. Besides, '\\xHH'
+    stands for the char of hex code HH, and '\\n', '\\t', '\\r', '\\f', '\\v'
+    for the usual control chars.
+
+    If the RE is given as bytes-like, it is in bytes mode: every byte is
+    read as the Latin-1 char of the same value, and negated ranges only
+    cover chars '\\x00'..'\\xff', so that the alphabet is made of bytes
+    0..255, and automata built from it match bytes-like input directly.
+
+    Extended notations are parsed into the tree directly, in a single pass.
+    '+' and '?' get their own nodes, whose only child is the left one, just
+    like '*'. 'r{m,n}' (also 'r{m}', 'r{m,}' and 'r{,n}') is unrolled into m
+    copies of r's subtree followed by optional ones, since every copy needs
+    positions of its own. A '{' which does not start a valid repetition, and
+    a lone '}', are normal char symbols.
 
     Attributes:
+        ori_expr - str , the input RE, decoded as Latin-1 if bytes-like
+        bytes_mode - bool, was the input RE bytes-like
         expr     - str , RE expression with concatenations as '-'
         tree     - Node, binary syntax tree of RE
         alphabet - list, alphabet in sorted order
         index    - dict, table recording posnumber-symbol pairs
+        atoms    - dict, table recording leaf symbol-alphabet symbols pairs,
+                         i.e. what every char or CharClass leaf matches
+        stats    - Stats, 'parse' and 'positions' phase timings, see
+                          prefa.profiling
     """
 
     def __init__(self, input_re_string):
-        # TODO(jose): Check correctness of input RE.
 
         def doOperation(operator_stack, operand_stack):
-            """Conducts an operation.
+            """Conducts a binary operation.
 
-            Pops the stack top operator, then pops corresponding number of
-            operands, do the operation, and push the result operand back into
-            stack. Notice that '*' node's child is assigned to its left one.
+            Pops the stack top operator, then pops its two operands, do the
+            operation, and push the result operand back into stack.
 
             Args:
                 operator_stack - list, stack of operators
                 operand_stack  - list, stack of operands
             """
-            op = operator_stack.pop()
-            if op == '*':
-                node = bintree.Node(op)
-                node.left = operand_stack.pop()
-                operand_stack.append(node)
-            elif op == '-' or op == '|':
-                node = bintree.Node(op)
-                node.right = operand_stack.pop()
-                node.left  = operand_stack.pop()
-                operand_stack.append(node)
+            node = bintree.Node(operator_stack.pop())
+            node.right = operand_stack.pop()
+            node.left  = operand_stack.pop()
+            operand_stack.append(node)
+
+        def parseBraces(i):
+            """Parses a repetition 'r{m,n}' starting at '{'.
 
-        def fetchPrevBlock(input_str):
-            """Cut the last block off a RE string.
+            Args:
+                i - int, index of '{' in the input string
+
+            Returns:
+                (m, n, next_i) - tuple, where N is None if unbounded, or None
+                                 if it is not a valid repetition
+            """
+            close = input_re_string.find('}', i)
+            if close < 0:
+                return None
+            bounds = input_re_string[i+1:close].split(',')
+            if len(bounds) == 1 and bounds[0].isdigit():
+                return int(bounds[0]), int(bounds[0]), close + 1
+            if len(bounds) == 2 and (bounds[0] == '' or bounds[0].isdigit()) \
+               and (bounds[1] == '' or bounds[1].isdigit()) and \
+               bounds != ['', '']:
+                m = int(bounds[0]) if bounds[0] != '' else 0
+                n = int(bounds[1]) if bounds[1] != '' else None
+                if n is not None and n < m:
+                    raise ValueError('Bad repetition bounds at position %d'
+                                     % i)
+                return m, n, close + 1
+            return None
 
-            A block can be either a single char, or a block of RE strings
-            enclosed with '(' and ')', or a block of extended notation
-            enclosed with '[' and ']'. This function cuts the last whole
-            block off the input string.
+        def parseEscape(i):
+            """Parses an escape starting at '\\'.
 
             Args:
-                input_str - str, string to extract the last block
+                i - int, index of '\\' in the input string
 
             Returns:
-                (remain_str, last_block) - tuple
+                (c, next_i) - tuple, the escaped char
             """
-            assert(len(input_str) > 0)
-            assert(input_str[-1] != '|' and input_str[-1] != '(')
-            if input_str[-1] in '*+?':
-                tail_symbol = input_str[-1]
-                return fetchPrevBlock(input_str[:-1])[0], \
-                       fetchPrevBlock(input_str[:-1])[1] + tail_symbol
-            elif input_str[-1] == ')':
-                last_block = input_str[-1]
-                input_str = input_str[:-1]
-                synch_count = 1
-                while synch_count > 0:
-                    c = input_str[-1]
-                    input_str = input_str[:-1]
-                    last_block = c + last_block
-                    if c == ')':
-                        synch_count += 1
-                    elif c == '(':
-                        synch_count -= 1
-                return input_str, last_block
-            elif input_str[-1] == ']':
-                last_block = ''
-                met_left = False
-                while not met_left:
-                    c = input_str[-1]
-                    input_str = input_str[:-1]
-                    last_block = c + last_block
-                    if c == '[':
-                        met_left = True
-                return input_str, last_block
-            else:
-                return input_str[:-1], input_str[-1]
+            if i + 1 >= len(input_re_string):
+                raise ValueError('Dangling escape at position %d' % i)
+            c = input_re_string[i+1]
+            if c == 'x':
+                code = input_re_string[i+2:i+4]
+                if len(code) < 2 or \
+                   any([h not in '0123456789abcdefABCDEF' for h in code]):
+                    raise ValueError('Bad hex escape at position %d' % i)
+                return chr(int(code, 16)), i + 4
+            return ESCAPES.get(c, c), i + 2
 
-        def dealRange(input_str):
-            """Deals with ranges notations.
+        def parseRange(i):
+            """Parses a range notation '[...]' starting at '['.
 
-            Expand the ranges notation at the end of input string to
-            the tedious sequence of ors.
+            Every item is either a single char or a 'x-y' range, where any
+            char can be escaped, and a leading '^' negates the whole range.
+            It becomes one leaf holding a CharClass, however many chars it
+            covers.
 
             Args:
-                input_str - str, string to deal with
+                i - int, index of '[' in the input string
 
             Returns:
-                output_str - str, string after expansion
+                (node, next_i) - tuple
             """
-            extend_str = ''
-            while input_str[-1] != '[':
-                start, end = input_str[-3], input_str[-1]
-                for asc in range(ord(start), ord(end)+1):
-                    extend_str += chr(asc) + '|'
-                input_str = input_str[:-3]
-            extend_str = extend_str[:-1]
-            return input_str[:-1] + '(' + extend_str + ')'
-
-        # Expand Extended RE symbols first. This is the simplest way to
-        # support these extended RE notations.
-        self.ori_expr, re_string = input_re_string, ''
-        for c in input_re_string:
-            if c == '?':
-                re_string, last_block = fetchPrevBlock(re_string)
-                re_string += '(' + last_block + '|~)'
-            elif c == '+':
-                re_string, last_block = fetchPrevBlock(re_string)
-                re_string += last_block + '(' + last_block + ')*'
-            elif c == ']':
-                re_string = dealRange(re_string)
+            intervals, j = [], i + 1
+            negated = j < len(input_re_string) and input_re_string[j] == '^'
+            if negated:
+                j += 1
+            while j < len(input_re_string) and input_re_string[j] != ']':
+                if input_re_string[j] == '\\':
+                    start, j = parseEscape(j)
+                else:
+                    start, j = input_re_string[j], j + 1
+                end = start
+                if j + 1 < len(input_re_string) and \
+                   input_re_string[j] == '-' and \
+                   input_re_string[j+1] != ']':
+                    if input_re_string[j+1] == '\\':
+                        end, next_j = parseEscape(j + 1)
+                    else:
+                        end, next_j = input_re_string[j+1], j + 2
+                    if end < start:
+                        raise ValueError('Bad range bounds at position %d'
+                                         % j)
+                    j = next_j
+                intervals.append((ord(start), ord(end)))
+            if j >= len(input_re_string):
+                raise ValueError('Unterminated range at position %d' % i)
+            char_class = CharClass(intervals, input_re_string[i:j+1],
+                                   negated, top)
+            if len(char_class) == 0:
+                raise ValueError('Empty range at position %d' % i)
+            symbols.add(char_class)
+            return bintree.Node(char_class), j + 1
+
+        def repeat(node, m, n):
+            """Unrolls 'r{m,n}' where NODE is the subtree of r.
+
+            Args:
+                node - Node, subtree to repeat
+                m    - int , least number of times
+                n    - int , most number of times, None if unbounded
+
+            Returns:
+                Node, the unrolled subtree
+            """
+            parts = []
+            for k in range(m):
+                parts.append(node if k == 0 else node._copy())
+            if n is None:
+                parts.append(bintree.Node('*', node if m == 0
+                                                else node._copy()))
             else:
-                re_string += c
-
-        # Insert '-' as concatenation indicator, and collects alphabet along
-        # the process. Concatenation happens only when current char is a
-        # symbol and previous char is not '|' / '('. End symbol '#' will also
-        # be added.
-        self.expr, self.alphabet = '', []
-        for c in re_string:
+                for k in range(m, n):
+                    parts.append(bintree.Node('?', node if k == 0
+                                                   else node._copy()))
+            if len(parts) == 0:
+                return bintree.Node('~')
+            result = parts[0]
+            for part in parts[1:]:
+                result = bintree.Node('-', result, part)
+            return result
+
+        # Scan the input once, building the syntax tree like calculating an
+        # in-fix expression. Postfix operators bind to the operand right
+        # before them, so they are applied at once. Concatenation happens
+        # when an operand starts right after another one ends, and an empty
+        # operand (e.g. in '()' or 'a|') is taken as epsilon. Whitespaces
+        # are ignored.
+        # TODO(jose): Check correctness of input RE more thoroughly.
+        self.stats = profiling.Stats('Regex')
+        clock = self.stats.start('parse')
+        self.bytes_mode = type(input_re_string) != str
+        if self.bytes_mode:
+            input_re_string = bytes(input_re_string).decode('latin-1')
+        top = MAX_BYTE if self.bytes_mode else MAX_CHAR
+        self.ori_expr = input_re_string
+        operator_stack, operand_stack, pieces = [], [], []
+        symbols, expect_operand, i = set(), True, 0
+        while i < len(input_re_string):
+            c = input_re_string[i]
             if c.isspace():
+                i += 1
                 continue
-            if c not in '()|*' and c not in self.alphabet:
-                self.alphabet.append(c)
-            if c not in ')|*' and len(self.expr) > 0 and \
-               self.expr[-1] not in '(|':
-                    self.expr += '-'
-            self.expr += c
-        if len(self.expr) > 0:
-            self.expr = '(' + self.expr + ')-'
-        self.expr += '#'
-        self.alphabet.sort()
-
-        # Construct binary syntax tree for RE. Overall process is just like
-        # calculating in-fix expressions, but the difference is that every
-        # operation will be a tree construction step.
-        priority = {'(': 0, '|': 1, '-': 2, '*': 3}
-        operator_stack, operand_stack = [], []
-        for c in self.expr:
-            if c not in '()|*-':    # True iff c is a symbol
-                operand_stack.append(bintree.Node(c))
-            elif c == '(':
-                operator_stack.append(c)
-            elif c != ')':          # True iff c is '|' / '-' / '*'
-                while (len(operator_stack) > 0 and
-                       priority[c] <= priority[operator_stack[-1]]):
+            braces = parseBraces(i) if c == '{' and not expect_operand \
+                     else None
+            if c in '*+?' or braces is not None:
+                if expect_operand:
+                    raise ValueError('Nothing to repeat at position %d' % i)
+                operand = operand_stack.pop()
+                if braces is not None:
+                    m, n, next_i = braces
+                    operand_stack.append(repeat(operand, m, n))
+                    pieces.append(input_re_string[i:next_i])
+                    i = next_i
+                else:
+                    operand_stack.append(bintree.Node(c, operand))
+                    pieces.append(c)
+                    i += 1
+                continue
+            if c == '|' or c == ')':
+                if expect_operand:
+                    symbols.add('~')
+                    operand_stack.append(bintree.Node('~'))
+                while len(operator_stack) > 0 and operator_stack[-1] != '(':
                     doOperation(operator_stack, operand_stack)
-                operator_stack.append(c)
-            elif c == ')':
-                while operator_stack[-1] != '(':
+                if c == '|':
+                    operator_stack.append(c)
+                    expect_operand = True
+                else:
+                    if len(operator_stack) == 0:
+                        raise ValueError('Unbalanced \')\' at position %d'
+                                         % i)
+                    operator_stack.pop()
+                    expect_operand = False
+                pieces.append(c)
+                i += 1
+                continue
+
+            # Now C starts an operand, so concatenate if one has just ended.
+            if not expect_operand:
+                while len(operator_stack) > 0 and operator_stack[-1] == '-':
                     doOperation(operator_stack, operand_stack)
-                operator_stack.pop()
+                operator_stack.append('-')
+                pieces.append('-')
+            if c == '(':
+                operator_stack.append(c)
+                pieces.append(c)
+                expect_operand = True
+                i += 1
+            elif c == '[':
+                node, next_i = parseRange(i)
+                operand_stack.append(node)
+                pieces.append(input_re_string[i:next_i])
+                expect_operand = False
+                i = next_i
+            elif c == '\\':     # Kept as a CharClass, never as a keyword
+                escaped, next_i = parseEscape(i)
+                char_class = CharClass([(ord(escaped), ord(escaped))],
+                                       input_re_string[i:next_i])
+                symbols.add(char_class)
+                operand_stack.append(bintree.Node(char_class))
+                pieces.append(input_re_string[i:next_i])
+                expect_operand = False
+                i = next_i
+            else:
+                symbols.add(c)
+                operand_stack.append(bintree.Node(c))
+                pieces.append(c)
+                expect_operand = False
+                i += 1
+        if expect_operand and len(pieces) > 0:
+            symbols.add('~')
+            operand_stack.append(bintree.Node('~'))
         while len(operator_stack) > 0:
+            if operator_stack[-1] == '(':
+                raise ValueError('Unbalanced \'(\'')
             doOperation(operator_stack, operand_stack)
-        self.tree = operand_stack.pop()
-        self.index = self.tree._markLeafPos()
+
+        # Append the end symbol '#', and collect the alphabet.
+        if len(operand_stack) > 0:
+            self.expr = '(' + ''.join(pieces) + ')-#'
+            self.tree = bintree.Node('-', operand_stack.pop(),
+                                     bintree.Node('#'))
+        else:
+            self.expr = '#'
+            self.tree = bintree.Node('#')
+        self.alphabet, self.atoms = splitAlphabet(symbols - {'~'})
+        if '~' in symbols:
+            self.alphabet = sorted(self.alphabet + ['~'])
+        self.stats.stop('parse', clock)
+        with self.stats.phase('positions'):
+            self.index = self.tree._markLeafPos()
 
     def __str__(self):
         return 'Original:  ' + self.ori_expr + '\nAugmented: ' + \
@@ -187,3 +427,4 @@ if __name__ == '__main__':
     print(Regex('(a|e)bc*'))
     print([Regex('a|c'), Regex('(0|1)*')])
     print(Regex('a+(a|~)?[0-2]?'))
+    print(Regex(b'\\x00[^\\x00]*\\~').alphabet)
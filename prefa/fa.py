@@ -3,6 +3,10 @@
 #  Date:  2019.01.15                                                         #
 ##############################################################################
 
+from prefa import profiling, tables
+import bisect
+# import profiling, tables
+
 class FiniteAutomata(object):
     """Finite Automata parent class.
 
@@ -29,51 +33,39 @@ class FiniteAutomata(object):
         table      - dict, the transition table
         alphabet   - list, alphabet in sorted order
         states     - list, list of all states in sorted order
+        stats      - Stats, counters and phase timings, see prefa.profiling
     """
 
     def __init__(self, input):
-        self._initFromFile(input)   # Parent class can only init from file
+        self.stats = profiling.Stats('FA')
+        with self.stats.phase('load'):
+            self._initFromFile(input)   # Parent class can only init from file
 
     def _initFromFile(self, input_file):
         """Initializer for formatted source file.
 
-        Reads in the formatted table in the source file, and constructs the
-        Finite Automata correspondingly.
+        Reads in the formatted table in the source file, or its binary form
+        made by tables.convert(), and constructs the Finite Automata
+        correspondingly.
 
         Args:
             input_file - str, input source file name (/ path)
-        """
 
-        # TODO(jose): Check correctness of input source file.
-        # Open the source file, and read in the first title line, which is
-        # also the alphabet.
-        f = open(input_file)
-        self.alphabet = f.readline().split()
-        self.alphabet.sort()
-
-        # Read in the transition table line by line, and store it as a dict.
-        self.table = {}
-        self.states = []
-        self.initial, self.acceptings = '', set()
-        for raw_line in f.readlines():
-            line = raw_line.split()
-            if (len(line) < len(self.alphabet) + 1):
-                continue    # Jump over error lines
-            state = line[0]
-            self.states.append(state)
-            self.table[state] = {}
-            for j in range(len(self.alphabet)):
-                dst = set(line[j+1].strip('}{ ').split(','))
-                if dst == {'-'}:
-                    self.table[state][self.alphabet[j]] = set()
-                else:
-                    self.table[state][self.alphabet[j]] = dst
-            if len(line) == len(self.alphabet) + 2:
-                if 'i' in line[-1]:     # 'i' in the end indicates initial
-                    self.initial = state
-                if 'a' in line[-1]:     # 'a' in the end indicates accepting
-                    self.acceptings.add(state)
-        f.close()
+        Raises:
+            ValueError, if the file is malformed, see tables.readText()
+        """
+        loaded = tables.read(input_file)
+        self.alphabet = loaded.alphabet
+        self.states = loaded.states
+        self.table = dict([(s, dict([(a, set()) for a in self.alphabet]))
+                           for s in self.states])
+        for k in range(len(loaded.src)):
+            self.table[self.states[loaded.src[k]]] \
+                [self.alphabet[loaded.sym[k]]].add(self.states[loaded.dst[k]])
+        self.initial = self.states[loaded.initial] if loaded.initial >= 0 \
+                       else ''
+        self.acceptings = set([s for u, s in enumerate(self.states)
+                               if loaded.accepting[u] == 1])
 
     def __str__(self):
 
@@ -129,6 +121,34 @@ class FiniteAutomata(object):
         else:
             return 'outlaw'
 
+    def symbolClasses(self, symbols=None):
+        """Groups symbols into equivalence classes by their transitions.
+
+        Two symbols are equivalent iff they lead to the same states from
+        every state, so that an automata only needs one column per class.
+
+        Args:
+            symbols - list, symbols to group, the whole alphabet by default
+
+        Returns:
+            classes - list, tuples of equivalent symbols, in sorted order
+        """
+        groups = {}
+        for a in sorted(self.alphabet if symbols is None else symbols):
+            key = tuple([frozenset(self.table[s][a]) for s in self.states])
+            groups.setdefault(key, []).append(a)
+        return sorted([tuple(group) for group in groups.values()])
+
+    def inputSymbols(self):
+        """Gets the symbols of the alphabet that input chars can match.
+
+        Every symbol, '~' included, as it is a normal symbol here.
+
+        Returns:
+            list, the input symbols, in sorted order
+        """
+        return self.alphabet
+
     def move(self, S, a):
         """Performs a transition move.
 
@@ -143,6 +163,8 @@ class FiniteAutomata(object):
         Returns:
             S_move - set, set of states that are moved to
         """
+        if profiling.enabled:
+            self.stats.count('moves')
         if type(S) == str:
             S = {S}
         S_move = set()
@@ -163,6 +185,8 @@ class FiniteAutomata(object):
         Returns:
             closure - set, the epsilon closure of S
         """
+        if profiling.enabled:
+            self.stats.count('eps_closures')
         if type(S) == str:
             S = {S}
         stack = list(S)
@@ -182,9 +206,11 @@ class FiniteAutomata(object):
         Goes through the automata and performs the checking process on the
         given string. Will print the whole process out, step by step. Also,
         it will produce a result whether the string is accepted or not.
+        Bytes-like input is read in place, every byte as the Latin-1 char
+        of the same value.
 
         Args:
-            input_str - str, the string to check
+            input_str - str or bytes-like, the string to check
 
         Returns:
             Bool, True if accepted, False otherwise.
@@ -192,12 +218,16 @@ class FiniteAutomata(object):
         cur_set, count = stateSet(self.epsClosure(self.initial)), 0
         output_str = '%3d:       ' % 0 + str(cur_set) + '\n'
         unknown_char_flag = False
+        symbol_of = SymbolMap(self.inputSymbols())
+        if type(input_str) != str:
+            input_str = map(chr, memoryview(input_str).cast('B'))
         for c in input_str:
-            if c not in self.alphabet:
+            if symbol_of[c] is None:
                 output_str += '%3d: --%c-> ' % (count, c) + 'ERROR\n'
                 unknown_char_flag = True
                 break
-            cur_set = stateSet(self.epsClosure(self.move(cur_set, c)))
+            cur_set = stateSet(self.epsClosure(self.move(cur_set,
+                                                         symbol_of[c])))
             count += 1
             if len(cur_set) == 0:
                 output_str += '%3d: --%c-> ' % (count, c) + 'ERROR\n'
@@ -209,6 +239,50 @@ class FiniteAutomata(object):
             return True
         return False
 
+def symbolRange(a):
+    """Gets the chars a symbol of an alphabet stands for.
+
+    A symbol is either a single char, or an interval 'x-y' standing for the
+    chars from 'x' to 'y' (see ere.splitAlphabet()).
+
+    Args:
+        a - str, a symbol in alphabet
+
+    Returns:
+        (first, last) - tuple, the first and last chars, or None if A is
+                        neither
+    """
+    if len(a) == 1:
+        return a, a
+    elif len(a) == 3 and a[1] == '-':
+        return a[0], a[2]
+    return None
+
+class SymbolMap(dict):
+    """Char-symbol table of an alphabet, where every input char is mapped to
+    the symbol standing for it, or None if there is no such symbol.
+
+    Single-char symbols are put in at initialization. Other chars are looked
+    up by bisection over the interval symbols the first time they are seen,
+    then remembered, up to CAPACITY chars.
+    """
+
+    capacity = 65536
+
+    def __init__(self, alphabet):
+        super(SymbolMap, self).__init__([(a, a) for a in alphabet
+                                         if len(a) == 1])
+        self.ranges = sorted([symbolRange(a) + (a,) for a in alphabet
+                              if len(a) > 1 and symbolRange(a) is not None])
+        self.starts = [first for first, _, _ in self.ranges]
+
+    def __missing__(self, c):
+        k = bisect.bisect_right(self.starts, c) - 1
+        a = self.ranges[k][2] if k >= 0 and c <= self.ranges[k][1] else None
+        if len(self) < self.capacity:
+            self[c] = a
+        return a
+
 class stateSet(set):
     """Class which reloads the str() function for type Set.
 
@@ -0,0 +1,78 @@
+##############################################################################
+# Author: Jose, Robert & King                                                #
+#  Date:  2019.01.15                                                         #
+##############################################################################
+
+from prefa import ere, dfa
+# import ere, dfa
+
+class Lexer(object):
+    """Maximal munch lexer on one combined DFA.
+
+    All the rules are merged into a single DFA by dfa.compileUnion(), where
+    every accepting state is tagged with the rules accepting there. Input
+    is then tokenized in one left-to-right pass: from the start of a token,
+    the DFA runs as far as it can, and the last accepting position seen
+    gives the longest token. When several rules accept the same longest
+    token, the rule given first wins. Whitespace between tokens is skipped,
+    but is not needed to separate them.
+
+    Attributes:
+        kinds   - list, token kinds, in order of rule priority
+        matcher - CompiledDFA, the combined DFA of all the rules
+        kind_of - tuple, token kind of every state number, None if not
+                         accepting
+    """
+
+    def __init__(self, rules):
+        """Builds the lexer.
+
+        Args:
+            rules - dict or list, kind-pattern pairs, in order of priority
+        """
+        rules = list(rules.items()) if isinstance(rules, dict) else \
+                list(rules)
+        self.kinds = [kind for kind, _ in rules]
+        self.matcher, tags = dfa.compileUnion([ere.Regex(pattern)
+                                               for _, pattern in rules])
+        self.kind_of = tuple([self.kinds[(tag & -tag).bit_length() - 1]
+                              if tag != 0 else None for tag in tags])
+
+    def tokenize(self, text):
+        """Tokenizes a text lazily.
+
+        Args:
+            text - str or bytes-like, the text to tokenize
+
+        Yields:
+            (kind, start, end) - tuple, every token found
+
+        Raises:
+            ValueError, if no rule matches at some position
+        """
+        view, lookup = self.matcher.indexable(text)
+        table, width = self.matcher.table, self.matcher.width
+        dead, initial = self.matcher.dead, self.matcher.initial
+        kind_of, length, pos = self.kind_of, len(view), 0
+        spaces = ' \t\n\r\f\v' if type(text) == str else b' \t\n\r\f\v'
+        while pos < length:
+            if view[pos] in spaces:
+                pos += 1
+                continue
+            state, i, end, kind = initial, pos, pos, None
+            while i < length:
+                state = table[state * width + lookup[view[i]]]
+                if state == dead:
+                    break
+                i += 1
+                if kind_of[state] is not None:
+                    end, kind = i, kind_of[state]
+            if end == pos:
+                raise ValueError('No matching rule at position %d' % pos)
+            yield kind, pos, end
+            pos = end
+
+if __name__ == '__main__':
+    lexer = Lexer([('ASSIGN', '<='), ('LESS', '<'), ('INT', '[0-9]+'),
+                   ('ID', '[A-Z]+')])
+    print(list(lexer.tokenize('X<=12 <Y')))
@@ -3,9 +3,10 @@
 #  Date:  2019.01.15                                                         #
 ##############################################################################
 
-from prefa import fa, ere
-from copy import deepcopy
-# import fa, ere
+from prefa import bintree, fa, ere, profiling, tables
+from array import array
+from types import MappingProxyType
+# import bintree, fa, ere, profiling, tables
 
 class NFiniteAutomata(fa.FiniteAutomata):
     """Non-determinsitic Finite Automata child class.
@@ -20,145 +21,586 @@ class NFiniteAutomata(fa.FiniteAutomata):
         acceptings - set , set of acccepting states
         table      - dict, the transition table
         alphabet   - list, alphabet in sorted order
-        states     - list, list of all states in sorted order
+        states     - list, list of all states, in numeric order ('s0', ...,
+                           's9', 's10', ..., 'sf') if built from a Regular
+                           Expression, else in the order of the file rows
+        stats      - Stats, construction phase timings, epsClosure() and
+                            move() calls, see prefa.profiling
+
+    An NFA built from a Regular Expression or read from a file is kept as
+    flat edge arrays over int states instead, see _initFromRE(),
+    _initGlushkov() and _initFromFile(), and TABLE / STATES are only made
+    from them the first time they are asked for.
+    Closures, the bit-parallel representation and symbol classes work on the
+    edges directly.
+
+    Epsilon closures of all states are computed once, at the first closure
+    query, and kept as int masks over STATES. They are dropped whenever one
+    of the fields above is reassigned; code that edits TABLE in place must
+    call invalidate() instead.
     """
 
-    def __init__(self, input):
+    def __init__(self, input, method='thompson'):
+        """Builds the NFA.
+
+        Args:
+            input  - str or Regex, source file path, or Regular Expression
+            method - str, 'thompson' or 'glushkov', how to build the NFA of
+                          a Regular Expression, see _initFromRE() and
+                          _initGlushkov()
+        """
+        self.__dict__['_edges'], self.__dict__['_final'] = None, None
+        self.invalidate()
+        self.stats = profiling.Stats('NFA')
         if type(input) == str:      # 1. Input from source file
-            self._initFromFile(input)
-            if '~' not in self.alphabet:    # Add epsilon if has been omitted.
-                self.alphabet.append('~')
-                for s in self.table:
-                    self.table[s]['~'] = set()
-        else:                       # 2. Input from a regex
-            self._initFromRE(input)
+            with self.stats.phase('load'):
+                self._initFromFile(input)
+        elif method == 'thompson':  # 2. Input from a regex
+            with self.stats.phase('thompson'):
+                self._initFromRE(input)
+        elif method == 'glushkov':
+            with self.stats.phase('glushkov'):
+                self._initGlushkov(input)
+        else:
+            raise ValueError('Unknown construction method %r' % method)
+        if profiling.enabled:
+            if self._edges is not None:
+                n, data = self._edges[0], self._edges
+            else:
+                n, data = len(self.states), self.table
+            self.stats['bytes_per_state'] = profiling.approxBytes(data) // \
+                                            max(n, 1)
 
     def _initFromRE(self, input_regex):
         """Initializer for a Regular Expression.
 
-        Takes a Regular Expression, builds an NFA from bottom-up, using
-        Thompson's construction method.
+        Takes a Regular Expression, builds an NFA using Thompson's
+        construction method. The syntax tree is walked from the root without
+        recursion, every node being given the initial and accepting states
+        of its sub-NFA. A leaf moves from one to the other, '|' gives both
+        children the same states, '-' makes a middle state shared by its
+        children, and '*' / '+' / '?' make two inner states for its child.
+        States come from one int counter and edges go into flat arrays, so
+        that the construction is linear in the size of the tree.
+
+        States are numbered, and named 's0', 's1', ..., 'sf', by the order
+        they are met in an in-order walk of the tree, that is from left to
+        right in the pattern.
 
         Args:
             input_regex - str, input Regular Expression
         """
+        self.alphabet = list(input_regex.alphabet)
+        if '~' not in self.alphabet:
+            self.alphabet.append('~')
+        self.initial, self.acceptings = 's0', {'sf'}
+        symbol_id = dict([(a, k) for k, a in enumerate(self.alphabet)])
+        eps = symbol_id['~']
+        src, sym, dst = array('l'), array('l'), array('l')
 
-        def calcTable(node):
-            """Generates the state table of sub-regex rooted at node.
-
-            Recursively constructs the transition table by a traversal of the
-            Regular Expression's binary syntax tree. Follows the Thompson's
-            construction method when building.
-
-            Args:
-                node - Node, current root of a regex
-
-            Returns:
-                (table, count) - tuple, state table and name count
-            """
-
-            # Reached a leaf node, then directly return with the most simple
-            # transition table. 
-            if node.value in input_regex.alphabet:
-                return {'s0': {node.value: {'sf'}}, 'sf': {}}, 1
-
-            # Meet '*' node, then add a new initial state and a new accepting
-            # state, change original initial and accepting state into two
-            # newly named states, adds epsilon transitions for them. Do not
-            # forget to update names refering to old 's0' / 'sf' to their new
-            # names.
-            elif node.value == '*':
-                table, count = calcTable(node.left)
-                name_i, name_f = 's' + str(count), 's' + str(count+1)
-                for s in table:     # Update old names to new ones
-                    for a in table[s]:
-                        if 's0' in table[s][a]:
-                            table[s][a].remove('s0')
-                            table[s][a].add(name_i)
-                        if 'sf' in table[s][a]:
-                            table[s][a].remove('sf')
-                            table[s][a].add(name_f)
-                table[name_i] = table['s0']     # Transplant to newly named
-                table[name_f] = table['sf']     # inner states
-                if '~' in table[name_f]:
-                    table[name_f]['~'] |= {name_i, 'sf'}
-                else:
-                    table[name_f]['~']  = {name_i, 'sf'}
-                table['s0'] = {'~': {name_i, 'sf'}}     # Make new 's0' / 'sf'
-                table['sf'] = {}
-                return table, count + 2
-            
-            # Meet '-' node, then concatenate its left child with its right
-            # child, by transplanting every state in right child into a newly
-            # named state into the left child.
+        def addEdge(u, k, v):
+            src.append(u)
+            sym.append(k)
+            dst.append(v)
+
+        # State 0 / 1 are the initial / accepting ones. A stack entry is
+        # either a (node, initial, accepting) to build, or a state number to
+        # give the next rank. '#' is neglected, as reaching the accepting
+        # state means accepting.
+        tree = input_regex.tree
+        root = tree.left if tree.value == '-' else bintree.Node('~')
+        rank, count, stack = [0, 0], 1, [(root, 0, 1)]
+        while len(stack) > 0:
+            entry = stack.pop()
+            if type(entry) == int:
+                rank[entry] = count
+                count += 1
+                continue
+            node, i, f = entry
+            if node.left is None and node.right is None:
+                for a in input_regex.atoms.get(node.value, (node.value,)):
+                    addEdge(i, symbol_id[a], f)
             elif node.value == '-':
-                if node.right.value == '#':   # Neglect '#' symbol in tree
-                    return calcTable(node.left)
-                table_l, count_l = calcTable(node.left)
-                table_r, count_r = calcTable(node.right)
-                for s in table_r:   # Update old names in right child
-                    for a in table_r[s]:
-                        tmp_set = table_r[s][a]
-                        for dst in tmp_set - {'sf'}:
-                            table_r[s][a].remove(dst)
-                            table_r[s][a].add('s' + str(int(dst[1:]) + count_l))
-                for s in table_l:   # Update old 'sf' names in left child
-                    for a in table_l[s]:
-                        if 'sf' in table_l[s][a]:
-                            table_l[s][a].remove('sf')
-                            table_l[s][a].add('s' + str(count_l))
-                count = count_l     # Insert right child entries into left
-                for i in range(count_r):
-                    table_l['s'+str(count)] = table_r['s'+str(i)]
-                    count += 1
-                for a in table_l['sf']:
-                    if a in table_l['s'+str(count_l)]:
-                        table_l['s'+str(count_l)][a].update(table_l['sf'][a])
-                    else:
-                        table_l['s'+str(count_l)][a] = table_l['sf'][a]
-                table_l['sf'] = table_r['sf']
-                return table_l, count
-
-            # Meet '|' node, then merge the two initial nodes and two
-            # accepting nodes from left and right child. States in right child
-            # are also renamed and inserted into elft child.
+                m = len(rank)
+                rank.append(0)
+                stack.extend([(node.right, m, f), m, (node.left, i, m)])
             elif node.value == '|':
-                table_l, count_l = calcTable(node.left)
-                table_r, count_r = calcTable(node.right)
-                for s in table_r:   # Update old names in right child
-                    for a in table_r[s]:
-                        tmp_set = table_r[s][a]
-                        for dst in tmp_set - {'s0', 'sf'}:
-                            table_r[s][a].remove(dst)
-                            table_r[s][a].add('s' + str(int(dst[1:]) +
-                                              count_l - 1))
-                for i in range(1, count_r):     # Insert right into left
-                    table_l['s'+str(count_l)] = table_r['s'+str(i)]
-                    count_l += 1
-                for a in table_r['s0']:     # Merge two s0
-                    if a in table_l['s0']:
-                        table_l['s0'][a].update(table_r['s0'][a])
-                    else:
-                        table_l['s0'][a] = table_r['s0'][a]
-                for a in table_r['sf']:     # Merge two s0
-                    if a in table_l['sf']:
-                        table_l['sf'][a].update(table_r['sf'][a])
-                    else:
-                        table_l['sf'][a] = table_r['sf'][a]
-                return table_l, count_l
-
-        # Generate and complete table at root recursively, then collects all
-        # other fields.
-        self.alphabet = deepcopy(input_regex.alphabet)
+                stack.extend([(node.right, i, f), (node.left, i, f)])
+            else:               # '*', '+' or '?'
+                m_i, m_f = len(rank), len(rank) + 1
+                rank.extend([0, 0])
+                addEdge(i, eps, m_i)
+                addEdge(m_f, eps, f)
+                if node.value != '+':   # May skip the inner part
+                    addEdge(i, eps, f)
+                if node.value != '?':   # May repeat the inner part
+                    addEdge(m_f, eps, m_i)
+                stack.extend([m_f, m_i, (node.left, m_i, m_f)])
+        rank[1] = count
+        for k in range(len(src)):
+            src[k], dst[k] = rank[src[k]], rank[dst[k]]
+        self.__dict__['_edges'] = (count + 1, src, sym, dst)
+        self.__dict__['_final'] = 'sf'
+
+    def _initGlushkov(self, input_regex):
+        """Initializer for a Regular Expression, without epsilon moves.
+
+        Builds the position (Glushkov) automaton from the same position
+        infos the DFA construction uses. State 's0' is the initial one, and
+        every other position i but '#' is a state 'si', entered on the
+        symbols of its leaf. The initial state moves into FIRSTPOS of the
+        tree, and position i into FOLLOWPOS(i). A state is accepting iff
+        '#' may follow it. No epsilon closure is ever needed on the result,
+        which has at most one state more than the leaves of the tree.
+
+        Args:
+            input_regex - str, input Regular Expression
+        """
+        self.alphabet = list(input_regex.alphabet)
         if '~' not in self.alphabet:
             self.alphabet.append('~')
-        self.table = calcTable(input_regex.tree)[0]
-        for s in self.table:
-            for a in self.alphabet:
-                if a not in self.table[s]:
-                    self.table[s][a] = set()
-        self.states = sorted(self.table.keys())
-        self.initial, self.acceptings = 's0', {'sf'}
+        followpos = input_regex.tree._calcPosInfo()
+        index, end = input_regex.index, len(input_regex.index)
+        symbol_id = dict([(a, k) for k, a in enumerate(self.alphabet)])
+        src, sym, dst = array('l'), array('l'), array('l')
+
+        # '#' is always the last position, every other one is a state.
+        acceptings = set()
+        for i in range(end):
+            follow = input_regex.tree.firstpos if i == 0 else followpos[i]
+            for j in sorted(follow):
+                if j == end:
+                    acceptings.add('s' + str(i))
+                    continue
+                for a in input_regex.atoms.get(index[j], (index[j],)):
+                    src.append(i)
+                    sym.append(symbol_id[a])
+                    dst.append(j)
+        self.initial, self.acceptings = 's0', acceptings
+        self.__dict__['_edges'] = (end, src, sym, dst)
+
+    def _initFromFile(self, input_file):
+        """Initializer for formatted source file.
+
+        Reads the file, text or binary, by tables.read() straight into edge
+        arrays, keeping the state names of the file.
+
+        Args:
+            input_file - str, input source file name (/ path)
+
+        Raises:
+            ValueError, if the file is malformed, see tables.readText()
+        """
+        loaded = tables.read(input_file)
+        self.alphabet = loaded.alphabet
+        if '~' not in self.alphabet:    # Add epsilon if has been omitted.
+            self.alphabet.append('~')
+        self.states = loaded.states
+        self.initial = self.states[loaded.initial] if loaded.initial >= 0 \
+                       else ''
+        self.acceptings = set([s for u, s in enumerate(self.states)
+                               if loaded.accepting[u] == 1])
+        self.__dict__['_edges'] = (len(self.states), loaded.src, loaded.sym,
+                                   loaded.dst)
+
+    def __getattr__(self, name):
+        """Makes TABLE and STATES from the edges when first asked for.
+        """
+        edges = self.__dict__.get('_edges')
+        if edges is None or name not in ('table', 'states'):
+            raise AttributeError(name)
+        n, src, sym, dst = edges
+        states = self.__dict__.get('states')
+        if states is None:
+            states = ['s' + str(u) for u in range(n)]
+            if self._final is not None:
+                states[-1] = self._final
+            self.__dict__['states'] = states
+        if name == 'table':
+            table = dict([(s, dict([(a, set()) for a in self.alphabet]))
+                          for s in states])
+            for k in range(len(src)):
+                table[states[src[k]]][self.alphabet[sym[k]]] \
+                    .add(states[dst[k]])
+            self.__dict__['table'] = table
+        return self.__dict__[name]
+
+    def __setattr__(self, name, value):
+        if name in ('initial', 'acceptings', 'table', 'alphabet', 'states'):
+            if self.__dict__.get('_edges') is not None:
+                self.table      # Keep what the edges stand for
+            self.invalidate()
+        super(NFiniteAutomata, self).__setattr__(name, value)
+
+    def invalidate(self):
+        """Drops the cached closure table and bit-parallel representation.
+
+        Once TABLE has been made from the edges, it may have been edited,
+        so that the edges are dropped as well.
+        """
+        self.__dict__['_eps_masks'] = None
+        self.__dict__['_bit_nfa']   = None
+        if 'table' in self.__dict__:
+            self.__dict__['_edges'] = None
+
+    def _edgeList(self):
+        """Gets all transitions as flat edge arrays over state numbers.
+
+        Returns:
+            (n, src, sym, dst) - tuple, number of states, then the source
+                                 state number, symbol number in ALPHABET
+                                 and destination state number of every edge,
+                                 where state numbers follow STATES order
+        """
+        if self._edges is not None:
+            return self._edges
+        bit = dict([(s, u) for u, s in enumerate(self.states)])
+        src, sym, dst = array('l'), array('l'), array('l')
+        for s in self.states:
+            for k, a in enumerate(self.alphabet):
+                for v in self.table[s].get(a, ()):
+                    if v in bit:
+                        src.append(bit[s])
+                        sym.append(k)
+                        dst.append(bit[v])
+        return len(self.states), src, sym, dst
+
+    def symbolClasses(self, symbols=None):
+        """Groups symbols into equivalence classes by their transitions.
+
+        Same as the parent class one, but works on the edges.
+
+        Args:
+            symbols - list, symbols to group, the whole alphabet by default
+
+        Returns:
+            classes - list, tuples of equivalent symbols, in sorted order
+        """
+        n, src, sym, dst = self._edgeList()
+        moves = [[] for _ in self.alphabet]
+        for k in range(len(src)):
+            moves[sym[k]].append((src[k], dst[k]))
+        groups = {}
+        for a in sorted(self.alphabet if symbols is None else symbols):
+            key = tuple(sorted(moves[self.alphabet.index(a)]))
+            groups.setdefault(key, []).append(a)
+        return sorted([tuple(group) for group in groups.values()])
+
+    def inputSymbols(self):
+        """Gets the symbols of the alphabet that input chars can match.
+
+        Every symbol but '~', which is epsilon here.
+
+        Returns:
+            list, the input symbols, in sorted order
+        """
+        return [a for a in self.alphabet if a != '~']
+
+    def _closureMasks(self):
+        """Gets the epsilon closure table of all states.
+
+        Condenses the epsilon graph into strongly connected components by an
+        iterative Tarjan's algorithm. Tarjan's algorithm finishes components
+        in reverse topological order, so that when a component is finished,
+        the closures of all components it reaches are already known, and its
+        own closure is their union plus its own members. States in the same
+        component share one closure.
+
+        Returns:
+            (masks, bit) - tuple, closure mask of every state in STATES
+                                  order, and the state-bit number table
+        """
+        if self._eps_masks is not None:
+            return self._eps_masks
+        clock = self.stats.start('closure')
+        n, src, sym, dst = self._edgeList()
+        eps_id = self.alphabet.index('~')
+        eps = [[] for _ in range(n)]
+        for k in range(len(src)):
+            if sym[k] == eps_id:
+                eps[src[k]].append(dst[k])
+        masks = [0] * n
+        index, low, on_stack = [-1] * n, [0] * n, [False] * n
+        stack, counter = [], 0
+        for root in range(n):
+            if index[root] >= 0:
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            work = [(root, iter(eps[root]))]
+            while len(work) > 0:
+                u, edges = work[-1]
+                for v in edges:
+                    if index[v] < 0:        # Tree edge, go deeper first
+                        index[v] = low[v] = counter
+                        counter += 1
+                        stack.append(v)
+                        on_stack[v] = True
+                        work.append((v, iter(eps[v])))
+                        break
+                    elif on_stack[v]:
+                        low[u] = min(low[u], index[v])
+                else:
+                    work.pop()
+                    if len(work) > 0:
+                        w = work[-1][0]
+                        low[w] = min(low[w], low[u])
+                    if low[u] == index[u]:  # U is root of a component
+                        members = []
+                        while True:
+                            v = stack.pop()
+                            on_stack[v] = False
+                            members.append(v)
+                            if v == u:
+                                break
+                        mask = 0
+                        for v in members:
+                            mask |= 1 << v
+                            for w in eps[v]:
+                                mask |= masks[w]
+                        for v in members:
+                            masks[v] = mask
+        bit = dict([(s, u) for u, s in enumerate(self.states)])
+        self.__dict__['_eps_masks'] = (masks, bit)
+        self.stats.stop('closure', clock)
+        return self._eps_masks
+
+    def epsClosure(self, S):
+        """Calculates the epsilon closure.
+
+        Looks up the precomputed closure table, see _closureMasks(). Unlike
+        the parent class one, S itself is left untouched.
+
+        Args:
+            S - set or str, states to calculate closure on
+
+        Returns:
+            closure - set, the epsilon closure of S
+        """
+        if profiling.enabled:
+            self.stats.count('eps_closures')
+        masks, bit = self._closureMasks()
+        if type(S) == str:
+            S = {S}
+        mask = 0
+        for s in S:
+            mask |= masks[bit[s]]
+        closure = set()
+        while mask:
+            low = mask & -mask
+            closure.add(self.states[low.bit_length() - 1])
+            mask ^= low
+        return closure
+
+    def bitNFA(self):
+        """Gets the bit-parallel representation of this NFA.
+
+        Built at the first call and then kept for later ones.
+
+        Returns:
+            BitNFA, the bit-parallel representation.
+        """
+        if self._bit_nfa is None:
+            with self.stats.phase('bitnfa'):
+                self.__dict__['_bit_nfa'] = BitNFA(self)
+        return self._bit_nfa
+
+    def simulate(self, input_str, verbose=False):
+        """Simulate the checking process on a given string.
+
+        Same as the parent class one, except that the non-verbose check runs
+        on the bit-parallel representation, which needs no set allocation
+        or closure DFS per char.
+
+        Args:
+            input_str - str or bytes-like, the string to check
+
+        Returns:
+            Bool, True if accepted, False otherwise.
+        """
+        if verbose:
+            return super(NFiniteAutomata, self).simulate(input_str, verbose)
+        return self.bitNFA().match(input_str)
+
+class BitNFA(object):
+    """Bit-parallel representation of an NFiniteAutomata.
+
+    The i-th state in STATES is the i-th bit of a Python int, so that a set
+    of states is a single int mask. For every symbol and state, the epsilon
+    closure of the move from that state is precomputed as a mask, so that a
+    step of simulation is an OR over the set bits of the current mask, and
+    needs no closure calculation at all.
+
+    Like CompiledDFA, it is immutable once built, and keeps copies rather
+    than the NFA's own tables, so that it can be shared.
+
+    Attributes:
+        states  - tuple, states in bit order
+        bit     - Mapping, read-only state-bit number table
+        closure - tuple, epsilon closure mask of every state
+        moves   - Mapping, read-only symbol-tuple table, the closed move
+                           mask of every state on that symbol
+        initial - int  , mask of the initial closure
+        accept  - int  , mask of the accepting states
+        symbol_of - SymbolMap, char-symbol table of the alphabet
+    """
+
+    __slots__ = ('states', 'bit', 'closure', 'moves', 'initial', 'accept',
+                 'symbol_of')
+
+    def __init__(self, input_nfa):
+        set_field = super(BitNFA, self).__setattr__
+        states = tuple(input_nfa.states)
+        bit = dict([(s, i) for i, s in enumerate(states)])
+        closure = tuple(input_nfa._closureMasks()[0])
+        n, src, sym, dst = input_nfa._edgeList()
+        moves = [[0] * n if a != '~' else None for a in input_nfa.alphabet]
+        for k in range(len(src)):
+            masks = moves[sym[k]]
+            if masks is not None:
+                masks[src[k]] |= closure[dst[k]]
+        moves = dict([(a, tuple(masks)) for a, masks in
+                      zip(input_nfa.alphabet, moves) if a != '~'])
+        set_field('states',    states)
+        set_field('bit',       MappingProxyType(bit))
+        set_field('closure',   closure)
+        set_field('moves',     MappingProxyType(moves))
+        set_field('initial',   closure[bit[input_nfa.initial]]
+                               if input_nfa.initial in bit else 0)
+        set_field('accept',    self.toMask(input_nfa.acceptings))
+        set_field('symbol_of', fa.SymbolMap(list(moves)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('BitNFA is immutable')
+
+    def __reduce__(self):
+        return (_bitNFA, (self.states, dict(self.bit), self.closure,
+                          dict(self.moves), self.initial, self.accept))
+
+    def toMask(self, S):
+        """Converts a set of states into a mask.
+
+        Args:
+            S - set, states to convert
+
+        Returns:
+            mask - int, the mask of S
+        """
+        mask = 0
+        for s in S:
+            mask |= 1 << self.bit[s]
+        return mask
+
+    def toSet(self, mask):
+        """Converts a mask into a set of states.
+
+        Args:
+            mask - int, the mask to convert
+
+        Returns:
+            S - set, states in the mask
+        """
+        return set([self.states[i] for i in range(mask.bit_length())
+                    if (mask >> i) & 1])
+
+    def step(self, mask, a):
+        """Performs a transition move followed by epsilon closure.
+
+        Args:
+            mask - int, states to start from
+            a    - str, a char symbol in alphabet
+
+        Returns:
+            mask_move - int, mask of the closed destination states
+        """
+        masks, mask_move = self.moves[a], 0
+        while mask:
+            low = mask & -mask
+            mask_move |= masks[low.bit_length() - 1]
+            mask ^= low
+        return mask_move
+
+    def advance(self, mask, chunk):
+        """Runs through a chunk of input.
+
+        Stops as soon as no state is left. Bytes-like chunks are read
+        without copying, every byte as the Latin-1 char of the same value.
+
+        Args:
+            mask  - int      , states to start from
+            chunk - str or bytes-like, input to run through
+
+        Returns:
+            mask - int, mask of the states reached
+        """
+        if type(chunk) != str and type(chunk) != bytes and \
+           type(chunk) != bytearray:
+            chunk = memoryview(chunk).cast('B')
+        moves, symbol_of = self.moves, self.symbol_of
+        for c in chunk:
+            if type(c) != str:
+                c = chr(c)
+            masks = moves.get(c)
+            if masks is None:   # Maybe in an interval symbol
+                a = symbol_of[c]
+                if a is None:
+                    return 0
+                masks = moves[a]
+            mask_move = 0
+            while mask:
+                low = mask & -mask
+                mask_move |= masks[low.bit_length() - 1]
+                mask ^= low
+            if mask_move == 0:
+                return 0
+            mask = mask_move
+        return mask
+
+    def isAccepting(self, mask):
+        """Is MASK accepting?
+
+        Args:
+            mask - int, a mask of states
+
+        Returns:
+            Bool, True iff MASK is accepting
+        """
+        return mask & self.accept != 0
+
+    def isDead(self, mask):
+        """Is MASK the empty set of states?
+
+        Args:
+            mask - int, a mask of states
+
+        Returns:
+            Bool, True iff MASK is empty
+        """
+        return mask == 0
+
+    def match(self, input_str):
+        """Checks whether the whole string is accepted.
+
+        Args:
+            input_str - str or bytes-like, the string to check
+
+        Returns:
+            Bool, True if accepted, False otherwise.
+        """
+        return self.advance(self.initial, input_str) & self.accept != 0
+
+def _bitNFA(states, bit, closure, moves, initial, accept):
+    """Rebuilds a pickled BitNFA from its fields."""
+    bits, set_field = BitNFA.__new__(BitNFA), object.__setattr__
+    for name, value in [('states', states), ('bit', MappingProxyType(bit)),
+                        ('closure', closure),
+                        ('moves', MappingProxyType(moves)),
+                        ('initial', initial), ('accept', accept),
+                        ('symbol_of', fa.SymbolMap(list(moves)))]:
+        set_field(bits, name, value)
+    return bits
 
 if __name__ == '__main__':
     print(NFiniteAutomata('../input/NFA'))
@@ -166,6 +608,7 @@ if __name__ == '__main__':
     rexpr = ere.Regex('(a|~)bc*')
     print(rexpr)
     print(NFiniteAutomata(rexpr))
+    print(NFiniteAutomata(rexpr, method='glushkov'))
 
     my_nfa = NFiniteAutomata(ere.Regex('[a-c]+b*|a'))
     print(my_nfa)
@@ -0,0 +1,258 @@
+##############################################################################
+# Author: Jose, Robert & King                                                #
+#  Date:  2019.01.15                                                         #
+##############################################################################
+
+from prefa import ere, dfa
+from collections import deque
+import multiprocessing
+import os
+import queue
+import time
+# import ere, dfa
+
+_worker_matcher = None  # The CompiledDFA inside a worker process
+
+def _initWorker(matcher):
+    """Pool initializer, keeps the shipped matcher in the worker.
+
+    Args:
+        matcher - CompiledDFA, the matcher to use in this worker
+    """
+    global _worker_matcher
+    _worker_matcher = matcher
+
+def _matchChunk(task):
+    """Matches a chunk of items inside a worker.
+
+    Args:
+        task - tuple, (index of the first item, list of items)
+
+    Returns:
+        (key, results, pid, items, symbols, seconds) - tuple
+    """
+    key, items = task
+    start, match = time.perf_counter(), _worker_matcher.match
+    results = [match(item) for item in items]
+    return (key, results, os.getpid(), len(items),
+            sum([len(item) for item in items]), time.perf_counter() - start)
+
+def _matchFileRange(task):
+    """Matches the lines in a byte range of a file inside a worker.
+
+    The range always starts at the beginning of a line and ends right after
+    a newline or at the end of file. Line endings are not matched.
+
+    Args:
+        task - tuple, (path, begin offset, end offset)
+
+    Returns:
+        (key, results, pid, items, symbols, seconds) - tuple, where results
+                                                       are (offset, bool)
+    """
+    path, begin, end = task
+    start, advance = time.perf_counter(), _worker_matcher.advance
+    initial, accepting = _worker_matcher.initial, _worker_matcher.accepting
+    with open(path, 'rb') as f:
+        f.seek(begin)
+        data = f.read(end - begin)
+    lines = data.split(b'\n')
+    if len(lines[-1]) == 0:
+        lines.pop()
+    results, offset = [], begin
+    for line in lines:
+        length = len(line)
+        if length > 0 and line[-1] == 13:   # Drop '\r' of '\r\n' endings
+            line = line[:-1]
+        results.append((offset, accepting[advance(initial, line)] == 1))
+        offset += length + 1
+    return (begin, results, os.getpid(), len(results), len(data),
+            time.perf_counter() - start)
+
+class ParallelMatcher(object):
+    """Matches large inputs on a pool of worker processes.
+
+    The compiled DFA is shipped to every worker once, when the pool starts.
+    Iterables are then cut into chunks of CHUNK_SIZE items, and files into
+    byte ranges of about CHUNK_BYTES aligned to line boundaries, which the
+    workers read by themselves. At most a few chunks per worker are in
+    flight at a time, so that inputs of any size run in bounded memory.
+    Results come back in input order, or as an unordered stream of
+    (key, result) pairs as soon as each chunk is done.
+
+    Can be used as a context manager, which closes the pool on exit.
+
+    Attributes:
+        matcher     - CompiledDFA, the matcher shipped to workers
+        processes   - int , number of worker processes
+        chunk_size  - int , number of items in a chunk of an iterable
+        chunk_bytes - int , number of bytes in a chunk of a file
+        stats       - dict, pid-dict table of 'items', 'symbols' and
+                            'seconds' done by every worker
+    """
+
+    def __init__(self, input_fa, processes=None, chunk_size=4096,
+                 chunk_bytes=1<<22):
+        if isinstance(input_fa, dfa.DFiniteAutomata):
+            input_fa = input_fa.compile()
+        self.matcher = input_fa
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk_size, self.chunk_bytes = chunk_size, chunk_bytes
+        self.stats = {}
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Shuts down the worker pool, if started.
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def _run(self, func, tasks, ordered):
+        """Runs tasks on the pool within a bounded window.
+
+        Args:
+            func    - function, worker function to apply
+            tasks   - iterable, arguments of every task
+            ordered - bool, whether to yield in the order of TASKS
+
+        Yields:
+            (key, results) - tuple, outcome of a task
+        """
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(self.processes, _initWorker,
+                                              (self.matcher,))
+        window = 4 * self.processes
+        if ordered:
+            pending = deque()
+            for task in tasks:
+                pending.append(self._pool.apply_async(func, (task,)))
+                if len(pending) >= window:
+                    yield self._record(pending.popleft().get())
+            while len(pending) > 0:
+                yield self._record(pending.popleft().get())
+        else:
+            done, in_flight = queue.Queue(), 0
+            for task in tasks:
+                self._pool.apply_async(func, (task,), callback=done.put,
+                                       error_callback=done.put)
+                in_flight += 1
+                if in_flight >= window:
+                    yield self._record(done.get())
+                    in_flight -= 1
+            while in_flight > 0:
+                yield self._record(done.get())
+                in_flight -= 1
+
+    def _record(self, outcome):
+        """Accounts a task outcome into STATS.
+
+        Args:
+            outcome - tuple or Exception, what a worker function returned
+
+        Returns:
+            (key, results) - tuple
+        """
+        if isinstance(outcome, BaseException):
+            raise outcome
+        key, results, pid, items, symbols, seconds = outcome
+        record = self.stats.setdefault(pid, {'items': 0, 'symbols': 0,
+                                             'seconds': 0.0})
+        record['items']   += items
+        record['symbols'] += symbols
+        record['seconds'] += seconds
+        return key, results
+
+    def imap(self, items, ordered=True):
+        """Matches every item of an iterable.
+
+        Args:
+            items   - iterable, str or bytes-like items to check
+            ordered - bool, whether to keep the input order
+
+        Yields:
+            Bool per item if ORDERED, else (index, Bool) pairs
+        """
+        def chunks():
+            chunk, index = [], 0
+            for item in items:
+                chunk.append(item)
+                if len(chunk) == self.chunk_size:
+                    yield index, chunk
+                    chunk, index = [], index + len(chunk)
+            if len(chunk) > 0:
+                yield index, chunk
+
+        for key, results in self._run(_matchChunk, chunks(), ordered):
+            if ordered:
+                for result in results:
+                    yield result
+            else:
+                for i, result in enumerate(results):
+                    yield key + i, result
+
+    def imapFile(self, path, ordered=True):
+        """Matches every line of a file.
+
+        Lines are read as bytes, every byte as the Latin-1 char of the same
+        value, and their line endings are not matched.
+
+        Args:
+            path    - str , path of the file
+            ordered - bool, whether to keep the line order
+
+        Yields:
+            Bool per line if ORDERED, else (byte offset, Bool) pairs
+        """
+        def ranges():
+            size = os.path.getsize(path)
+            with open(path, 'rb') as f:
+                begin = 0
+                while begin < size:
+                    f.seek(min(begin + self.chunk_bytes, size))
+                    f.readline()    # Move on to the next line boundary
+                    end = min(f.tell(), size)
+                    yield path, begin, end
+                    begin = end
+
+        for key, results in self._run(_matchFileRange, ranges(), ordered):
+            for offset, result in results:
+                yield result if ordered else (offset, result)
+
+    def matchAll(self, items):
+        """Matches every item of an iterable, in order.
+
+        Args:
+            items - iterable, str or bytes-like items to check
+
+        Returns:
+            list, Bool per item
+        """
+        return list(self.imap(items))
+
+    def throughput(self):
+        """Reports throughput of every worker so far.
+
+        Returns:
+            dict, pid-(items per second, symbols per second) table
+        """
+        rates = {}
+        for pid, record in self.stats.items():
+            seconds = max(record['seconds'], 1e-9)
+            rates[pid] = (record['items']   / seconds,
+                          record['symbols'] / seconds)
+        return rates
+
+if __name__ == '__main__':
+    min_dfa = dfa.DFiniteAutomata(ere.Regex('[a-c]+b*|a')).minimalDFA()
+    with ParallelMatcher(min_dfa, processes=2, chunk_size=2) as matcher:
+        print(matcher.matchAll(['acb', 'ad', 'a', '', 'bbb']))
+        print(sorted(matcher.imap(['acb', 'ad', 'a'], ordered=False)))
+        print(matcher.throughput())
@@ -0,0 +1,190 @@
+##############################################################################
+# Author: Jose, Robert & King                                                #
+#  Date:  2019.01.15                                                         #
+##############################################################################
+
+from contextlib import contextmanager
+import sys
+import time
+
+# Whether phase timings and the costlier counters are recorded, see enable().
+enabled = False
+_hooks  = []
+
+def enable():
+    """Turns profiling on for every automaton built or run from now on.
+    """
+    global enabled
+    enabled = True
+
+def disable():
+    """Turns profiling off, which is the default.
+    """
+    global enabled
+    enabled = False
+
+def addHook(hook):
+    """Registers a callback, called as HOOK(stats, phase, seconds) whenever
+    a phase ends while profiling is on, e.g. to forward it to a metrics
+    system.
+
+    Args:
+        hook - function, the callback
+    """
+    _hooks.append(hook)
+
+def removeHook(hook):
+    """Unregisters a callback added by addHook().
+
+    Args:
+        hook - function, the callback
+    """
+    _hooks.remove(hook)
+
+@contextmanager
+def profiling(hook=None):
+    """Turns profiling on within a with-block.
+
+    Args:
+        hook - function, an optional callback registered within the block
+    """
+    global enabled
+    was_enabled, enabled = enabled, True
+    if hook is not None:
+        addHook(hook)
+    try:
+        yield
+    finally:
+        enabled = was_enabled
+        if hook is not None:
+            removeHook(hook)
+
+def approxBytes(obj):
+    """Approximates the memory taken by a transition table.
+
+    Sums `sys.getsizeof` over OBJ and everything inside of its dicts,
+    lists, tuples and sets. Objects reached twice are counted once.
+
+    Args:
+        obj - object, e.g. a dict-of-dict-of-set table
+
+    Returns:
+        int, number of bytes
+    """
+    size, seen, stack = 0, set(), [obj]
+    while len(stack) > 0:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+    return size
+
+class _Phase(object):
+    """Context manager timing a phase of a Stats."""
+
+    def __init__(self, stats, name):
+        self.stats, self.name = stats, name
+
+    def __enter__(self):
+        self.clock = self.stats.start(self.name)
+
+    def __exit__(self, *exc_info):
+        self.stats.stop(self.name, self.clock)
+
+class Stats(dict):
+    """Statistics of building or running an automaton.
+
+    Counters are the items of the dict itself. Cheap ones, like the number
+    of DStates created in a subset construction, are always kept. Phase
+    timings and the costlier counters, e.g. epsClosure() / move() calls,
+    peak subset size, partition refinement rounds and approximate bytes
+    per state, are only recorded while profiling is enabled.
+
+    Attributes:
+        kind   - str , what is measured, e.g. 'DFA'
+        phases - dict, phase-seconds table of wall time, in the order the
+                       phases first ran
+    """
+
+    def __init__(self, kind, counters=()):
+        dict.__init__(self, counters)
+        self.kind, self.phases = kind, {}
+
+    def __repr__(self):
+        return 'Stats({!r}, {}, phases={})'.format(self.kind, dict(self),
+                                                   self.phases)
+
+    def start(self, name):
+        """Starts timing a phase.
+
+        Args:
+            name - str, name of the phase
+
+        Returns:
+            float or None, the clock to pass to stop(), None if profiling
+                           is off
+        """
+        return time.perf_counter() if enabled else None
+
+    def stop(self, name, clock):
+        """Stops timing a phase, adding up its wall time and calling the
+        hooks.
+
+        Args:
+            name  - str, name of the phase
+            clock - float or None, what start() returned
+        """
+        if clock is None:
+            return
+        seconds = time.perf_counter() - clock
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+        for hook in list(_hooks):
+            hook(self, name, seconds)
+
+    def phase(self, name):
+        """Times a with-block as a phase.
+
+        Args:
+            name - str, name of the phase
+
+        Returns:
+            context manager of the phase
+        """
+        return _Phase(self, name)
+
+    def count(self, name, n=1):
+        """Adds N to a counter.
+        """
+        self[name] = self.get(name, 0) + n
+
+    def peak(self, name, value):
+        """Raises a counter to VALUE if it is lower.
+        """
+        if value > self.get(name, 0):
+            self[name] = value
+
+    def asDict(self):
+        """Gets everything as a plain dict, e.g. to be dumped as JSON.
+
+        Returns:
+            dict, the counters, plus 'kind' and 'phases'
+        """
+        result = dict(self)
+        result['kind'], result['phases'] = self.kind, dict(self.phases)
+        return result
+
+if __name__ == '__main__':
+    from prefa import ere, dfa, profiling as prof   # Not this __main__ copy
+    with prof.profiling(lambda stats, phase, seconds:
+                        print('%-8s %-10s %.6f' % (stats.kind, phase,
+                                                   seconds))):
+        my_dfa = dfa.DFiniteAutomata(ere.Regex('(a|b)*a(a|b){3}'))
+        min_dfa = my_dfa.minimalDFA()
+    print(my_dfa.stats)
+    print(min_dfa.stats.asDict())
@@ -0,0 +1,79 @@
+##############################################################################
+# Author: Jose, Robert & King                                                #
+#  Date:  2019.01.15                                                         #
+##############################################################################
+
+from prefa import ere, dfa
+# import ere, dfa
+
+class RegexSet(object):
+    """Set of Regular Expressions matched all together.
+
+    All the patterns are compiled into one DFA by dfa.compileUnion(), where
+    every accepting state carries a bitset of pattern ids, taken from which
+    end symbols '#' its positions contain. A single scan of the input then
+    tells every pattern that matches the whole of it.
+
+    Attributes:
+        patterns - list, the patterns, indexed by pattern id
+        matcher  - CompiledDFA, the combined DFA of all the patterns
+        tags     - tuple, bitset (int) of matching pattern ids of every
+                          state number
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self.matcher, self.tags = dfa.compileUnion([ere.Regex(pattern)
+                                                    for pattern in
+                                                    self.patterns])
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def __repr__(self):
+        return 'RegexSet({})'.format(self.patterns)
+
+    def matchMask(self, input_str):
+        """Gets the bitset of the patterns matching a whole string.
+
+        Args:
+            input_str - str or bytes-like, the string to check
+
+        Returns:
+            int, bitset whose i-th bit is set iff pattern i matches
+        """
+        return self.tags[self.matcher.advance(self.matcher.initial,
+                                              input_str)]
+
+    def matches(self, input_str):
+        """Gets the ids of the patterns matching a whole string.
+
+        Args:
+            input_str - str or bytes-like, the string to check
+
+        Returns:
+            list, ids of the matching patterns in ascending order
+        """
+        mask, ids = self.matchMask(input_str), []
+        while mask:
+            low = mask & -mask
+            ids.append(low.bit_length() - 1)
+            mask ^= low
+        return ids
+
+    def isMatch(self, input_str):
+        """Does any of the patterns match a whole string?
+
+        Args:
+            input_str - str or bytes-like, the string to check
+
+        Returns:
+            Bool, True iff some pattern matches
+        """
+        return self.matchMask(input_str) != 0
+
+if __name__ == '__main__':
+    rset = RegexSet(['[a-c]+', 'ab*', 'b*a', '(0|1)*'])
+    print(rset)
+    print(rset.matches('abb'), rset.matches('a'), rset.matches(''))
+    print(rset.isMatch('2'))
@@ -0,0 +1,271 @@
+##############################################################################
+# Author: Jose, Robert & King                                                #
+#  Date:  2019.01.15                                                         #
+##############################################################################
+
+from prefa import ere, dfa, profiling
+import mmap
+import threading
+# import ere, dfa, profiling
+
+class _States(object):
+    """One generation of the lazily built unanchored states of a Searcher.
+
+    Entries are only ever appended, and a TRANS cell is only ever set from
+    -1 to a state id, so that scans may read them without the lock.
+
+    Attributes:
+        keys   - list, (threads, matched) of every unanchored state id
+        ids    - dict, (threads, matched)-state id table
+        trans  - list, flat lazy transitions of unanchored states, -1 if
+                       not computed yet
+        accept - list, accepting flag of every unanchored state
+        stop   - list, flag of every unanchored state having no thread
+    """
+
+    __slots__ = ('keys', 'ids', 'trans', 'accept', 'stop')
+
+    def __init__(self):
+        self.keys, self.ids, self.trans = [], {}, []
+        self.accept, self.stop = [], []
+
+class Searcher(object):
+    """Unanchored leftmost-longest search with a CompiledDFA.
+
+    A match is located in two scans. The forward scan runs an unanchored
+    DFA for Sigma* followed by the pattern, which is determinized lazily on
+    top of the anchored DFA. Its states are the anchored DFA states reached
+    from every start position so far, ordered from the earliest start and
+    keeping only the earliest start of equal ones. Once one of them accepts,
+    later starts are dropped and no new start is added any more, so that
+    the last accepting position seen before the scan dies is the end of the
+    leftmost-longest match. The backward scan then runs the DFA of the
+    reversed pattern from that end, and its last accepting position is
+    where the match starts.
+
+    Text can be a str, or a bytes-like object (bytes, bytearray, memoryview,
+    mmap) which is scanned in place, every byte as the Latin-1 char of the
+    same value.
+
+    Unanchored states are kept in a cache of about MAX_STATES entries. When
+    it is full, it is flushed like the 'clear' policy of dfa.LazyDFA, by
+    starting a new generation of states; scans still running on the old
+    generation move over at their next uncached transition. New states are
+    only made under a lock, so that one Searcher can be shared by threads.
+
+    Attributes:
+        forward    - CompiledDFA, the anchored DFA of the pattern
+        reverse    - CompiledDFA, the anchored DFA of the reversed pattern
+        max_states - int    , cap on the number of cached unanchored states
+        states     - _States, the current generation of unanchored states,
+                              where state 0 is the initial one
+        stats      - Stats  , 'misses' and 'flushes' counters
+    """
+
+    def __init__(self, compiled, max_states=4096):
+        if max_states < 1:
+            raise ValueError('Cache must hold at least one state')
+        self.forward, self.reverse = compiled, compiled.reverse()
+        self.max_states = max_states
+        self.stats = profiling.Stats('Searcher', {'misses': 0, 'flushes': 0})
+        self._lock = threading.Lock()
+        q0 = compiled.initial
+        self._initial = ((q0,) if q0 != compiled.dead else (), False)
+        self.states = _States()
+        self._stateOf(self.states, *self._initial)
+
+    def _stateOf(self, states, threads, matched):
+        """Gets the id of an unanchored state, making it if new. Must be
+        called with the lock held, but for the initial state.
+
+        Cuts THREADS right after the first accepting one, since later
+        starts can never make a more leftmost match.
+
+        Args:
+            states  - _States, the generation to look in
+            threads - tuple  , anchored DFA states from the earliest start
+            matched - bool   , whether a match has been seen
+
+        Returns:
+            int, id of the unanchored state
+        """
+        accepting = self.forward.accepting
+        for k, q in enumerate(threads):
+            if accepting[q] == 1:
+                threads, matched = threads[:k+1], True
+                break
+        key = (threads, matched)
+        state = states.ids.get(key)
+        if state is None:
+            state = len(states.keys)
+            states.keys.append(key)
+            states.trans.extend([-1] * self.forward.width)
+            states.accept.append(len(threads) > 0 and
+                                 accepting[threads[-1]] == 1)
+            states.stop.append(len(threads) == 0)
+            states.ids[key] = state
+        return state
+
+    def _step(self, states, state, column):
+        """Computes an unanchored transition and remembers it.
+
+        Flushes the cache first if it is full. If STATES is an older
+        generation, STATE is carried over into the current one.
+
+        Args:
+            states - _States, the generation STATE belongs to
+            state  - int    , id of the unanchored state
+            column - int    , column of the input symbol
+
+        Returns:
+            (states, next) - tuple, the current generation, and the id of
+                             the next unanchored state in it
+        """
+        with self._lock:
+            threads, matched = states.keys[state]
+            if states is not self.states or \
+               len(self.states.keys) >= self.max_states:
+                if states is self.states:
+                    fresh = _States()   # Published only once it has state 0
+                    self._stateOf(fresh, *self._initial)
+                    self.states = fresh
+                    self.stats['flushes'] += 1
+                states = self.states
+                state = self._stateOf(states, threads, matched)
+            width = self.forward.width
+            nxt = states.trans[state * width + column]
+            if nxt >= 0:        # Made by another thread meanwhile
+                return states, nxt
+            self.stats['misses'] += 1
+            table, dead = self.forward.table, self.forward.dead
+            moved, seen = [], set()
+            for q in threads:
+                r = table[q * width + column]
+                if r != dead and r not in seen:
+                    seen.add(r)
+                    moved.append(r)
+            q0 = self.forward.initial
+            if not matched and q0 != dead and q0 not in seen:
+                moved.append(q0)    # A new start after this symbol
+            nxt = self._stateOf(states, tuple(moved), matched)
+            states.trans[state * width + column] = nxt
+            return states, nxt
+
+    def _search(self, view, lookup, pos, endpos):
+        """Locates the leftmost-longest match in VIEW[POS:ENDPOS].
+
+        Args:
+            view   - str or memoryview, indexable text
+            lookup - dict or tuple, symbol-column lookup of VIEW's items
+            pos    - int, where the search starts
+            endpos - int, where the search ends
+
+        Returns:
+            (start, end) - tuple, or None if there is no match
+        """
+
+        # Forward scan for the end of the match.
+        states = self.states
+        trans, accept, stop = states.trans, states.accept, states.stop
+        width = self.forward.width
+        state, end = 0, -1
+        if accept[state]:
+            end = pos
+        i = pos
+        while i < endpos:
+            column = lookup[view[i]]
+            nxt = trans[state * width + column]
+            if nxt < 0:
+                states, nxt = self._step(states, state, column)
+                trans, accept, stop = states.trans, states.accept, \
+                                      states.stop
+            state = nxt
+            i += 1
+            if accept[state]:
+                end = i
+            elif stop[state]:   # No thread is left
+                break
+        if end < 0:
+            return None
+
+        # Backward scan for the start of the match.
+        table, width = self.reverse.table, self.reverse.width
+        accepting, dead = self.reverse.accepting, self.reverse.dead
+        state, start = self.reverse.initial, end
+        i = end
+        while i > pos and state != dead:
+            i -= 1
+            state = table[state * width + lookup[view[i]]]
+            if accepting[state] == 1:
+                start = i
+        return start, end
+
+    def search(self, text, pos=0, endpos=None):
+        """Finds the leftmost-longest match in a text.
+
+        Args:
+            text   - str or bytes-like, the text to search
+            pos    - int, where the search starts
+            endpos - int, where the search ends, end of TEXT by default
+
+        Returns:
+            (start, end) - tuple, span of the match, or None if no match
+        """
+        view, lookup = self.forward.indexable(text)
+        if endpos is None or endpos > len(view):
+            endpos = len(view)
+        return self._search(view, lookup, pos, endpos)
+
+    def finditer(self, text, pos=0, endpos=None):
+        """Finds all non-overlapping leftmost-longest matches in a text.
+
+        After an empty match, the next search starts one symbol later.
+
+        Args:
+            text   - str or bytes-like, the text to search
+            pos    - int, where the search starts
+            endpos - int, where the search ends, end of TEXT by default
+
+        Yields:
+            (start, end) - tuple, span of every match
+        """
+        view, lookup = self.forward.indexable(text)
+        if endpos is None or endpos > len(view):
+            endpos = len(view)
+        while pos <= endpos:
+            span = self._search(view, lookup, pos, endpos)
+            if span is None:
+                break
+            yield span
+            pos = span[1] if span[1] > span[0] else span[1] + 1
+
+    def finditerFile(self, path):
+        """Finds all matches in a file, scanning it through `mmap`.
+
+        Args:
+            path - str, path of the file
+
+        Yields:
+            (start, end) - tuple, byte span of every match
+        """
+        with open(path, 'rb') as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # Empty files cannot be mapped
+                return
+            try:
+                view = memoryview(mm)
+                try:
+                    for span in self.finditer(view):
+                        yield span
+                finally:
+                    view.release()
+            finally:
+                mm.close()
+
+if __name__ == '__main__':
+    searcher = Searcher(dfa.DFiniteAutomata(ere.Regex('ab*|b')).minimalDFA()
+                        .compile())
+    print(searcher.search('ccabbbc'))
+    print(list(searcher.finditer('abbcbab')))
+    print(list(searcher.finditer(b'xxabxb')))
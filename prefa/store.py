@@ -0,0 +1,230 @@
+##############################################################################
+# Author: Jose, Robert & King                                                #
+#  Date:  2019.01.15                                                         #
+##############################################################################
+
+import prefa
+from prefa import ere, dfa, tables
+from array import array
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+# import ere, dfa, tables
+
+MAGIC   = b'PREFADFA'
+VERSION = 2
+HEADER  = struct.Struct('<8sHHIIII')
+
+class _Names(object):
+    """Lazy sequence of state names 'S0'..'S{N-1}', so that loading a
+    matcher does not need to build N strings.
+    """
+
+    def __init__(self, count):
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.count
+        if i < 0 or i >= self.count:
+            raise IndexError('state number out of range')
+        return 'S' + str(i)
+
+    def __reduce__(self):
+        return (_Names, (self.count,))
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+def dumps(matcher):
+    """Serializes a CompiledDFA into the binary format.
+
+    The layout is, all in little-endian and every block aligned to 8:
+
+        header   - magic, format version, reserved, state count N, width,
+                   initial state, byte length of the classes block
+        classes  - every column's class as a u16 symbol count, then every
+                   symbol in it as a u16 length and its UTF-8 bytes
+        accepts  - N+1 bytes, accepting flag of every state number
+        table    - (N+1) * width int32, the flat transition table
+
+    State names are not kept, loaded matchers name states 'S0'..'S{N-1}'.
+
+    Args:
+        matcher - CompiledDFA, the matcher to serialize
+
+    Returns:
+        bytes, the serialized matcher
+    """
+    symbols = b''
+    for group in matcher.classes:
+        symbols += struct.pack('<H', len(group))
+        for a in group:
+            code = a.encode('utf-8', 'surrogatepass')
+            symbols += struct.pack('<H', len(code)) + code
+    n = matcher.dead
+    head = HEADER.pack(MAGIC, VERSION, 0, n, matcher.width, matcher.initial,
+                       len(symbols)) + symbols
+    head += b'\0' * (_align(len(head)) - len(head))
+    accepts = bytes(matcher.accepting)
+    accepts += b'\0' * (_align(len(accepts)) - len(accepts))
+    table = array('i', matcher.table)
+    if sys.byteorder != 'little':
+        table.byteswap()
+    return head + accepts + table.tobytes()
+
+def dump(matcher, path):
+    """Writes a CompiledDFA into a file, atomically replacing it.
+
+    Args:
+        matcher - CompiledDFA, the matcher to serialize
+        path    - str, path of the file
+    """
+    data = dumps(matcher)
+    tables.writeAtomically(path, lambda f: f.write(data))
+
+def loads(data):
+    """Deserializes a CompiledDFA from the binary format.
+
+    The accepting flags and the transition table are used in place through
+    memoryviews of DATA, without copying, on little-endian machines.
+
+    Args:
+        data - bytes-like, the serialized matcher
+
+    Returns:
+        CompiledDFA, the matcher
+
+    Raises:
+        ValueError, if DATA is not a valid serialized matcher, including
+                    any table entry or initial state out of 0..N
+    """
+    view = memoryview(data).cast('B')
+    if len(view) < HEADER.size:
+        raise ValueError('Truncated automaton data')
+    magic, version, _, n, width, initial, symbols_len = \
+        HEADER.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise ValueError('Not a prefa automaton')
+    if version != VERSION:
+        raise ValueError('Unsupported automaton format version %d' % version)
+    classes, offset = [], HEADER.size
+    try:
+        while offset < HEADER.size + symbols_len:
+            count, group = struct.unpack_from('<H', view, offset)[0], []
+            offset += 2
+            for _ in range(count):
+                length = struct.unpack_from('<H', view, offset)[0]
+                group.append(bytes(view[offset+2:offset+2+length])
+                             .decode('utf-8', 'surrogatepass'))
+                offset += 2 + length
+            classes.append(tuple(group))
+    except (struct.error, UnicodeDecodeError):
+        raise ValueError('Truncated automaton data')
+    offset = _align(offset)
+    accepting = view[offset:offset+n+1]
+    offset = _align(offset + n + 1)
+    table = view[offset:offset+4*(n+1)*width]
+    if len(classes) + 1 != width or len(table) != 4 * (n + 1) * width or \
+       len(accepting) != n + 1 or initial > n:
+        raise ValueError('Corrupted automaton data')
+    if sys.byteorder == 'little':
+        table = table.cast('i')
+    else:
+        table = array('i', table.tobytes())
+        table.byteswap()
+    if len(table) > 0 and (min(table) < 0 or max(table) > n):
+        raise ValueError('Corrupted automaton data')
+    return dfa.CompiledDFA(_Names(n), tuple(classes), table, initial,
+                           accepting)
+
+def load(path):
+    """Loads a CompiledDFA from a file through `mmap`.
+
+    The pages are mapped read-only and shared, so that many processes
+    loading the same file keep only one copy of it in memory.
+
+    Args:
+        path - str, path of the file
+
+    Returns:
+        CompiledDFA, the matcher
+    """
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return loads(mm)
+
+class DiskCache(object):
+    """On-disk cache of compiled minimal DFAs of Regular Expressions.
+
+    Every pattern is stored in its own file in the binary format, named by
+    a hash of the pattern, the format version and the library version, so
+    that upgrading the library never picks up stale files.
+
+    Attributes:
+        directory - str, where the files are kept
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def pathOf(self, pattern):
+        """Gets the file path of a pattern.
+
+        Args:
+            pattern - str or bytes, the Regular Expression
+
+        Returns:
+            str, path of its file in the cache
+        """
+        key = '\0'.join([repr(pattern), str(VERSION), prefa.__version__])
+        name = hashlib.sha256(key.encode('utf-8')).hexdigest() + '.dfa'
+        return os.path.join(self.directory, name)
+
+    def compile(self, pattern):
+        """Gets the compiled minimal DFA of a pattern.
+
+        Loads it from the cache if there, else builds it, then stores it.
+        Unreadable cache files are rebuilt.
+
+        Args:
+            pattern - str or bytes, the Regular Expression
+
+        Returns:
+            CompiledDFA, the matcher
+        """
+        path = self.pathOf(pattern)
+        if os.path.exists(path):
+            try:
+                return load(path)
+            except ValueError:
+                pass
+        matcher = dfa.DFiniteAutomata(ere.Regex(pattern)).minimalDFA() \
+                     .compile()
+        dump(matcher, path)
+        return matcher
+
+    def clear(self):
+        """Removes all files of the cache.
+        """
+        for name in os.listdir(self.directory):
+            if name.endswith('.dfa'):
+                os.remove(os.path.join(self.directory, name))
+
+if __name__ == '__main__':
+    matcher = dfa.DFiniteAutomata(ere.Regex('(a|~)*b*a|ba')).minimalDFA() \
+                 .compile()
+    data = dumps(matcher)
+    print(len(data), loads(data).match('aaaabba'))
+
+    cache = DiskCache(tempfile.mkdtemp())
+    print(cache.compile('[a-c]+b*|a').match('acbb'))
+    print(cache.compile('[a-c]+b*|a').match('acbb'))
+    cache.clear()
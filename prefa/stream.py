@@ -0,0 +1,103 @@
+##############################################################################
+# Author: Jose, Robert & King                                                #
+#  Date:  2019.01.15                                                         #
+##############################################################################
+
+from prefa import ere, nfa, dfa
+# import ere, nfa, dfa
+
+class StreamMatcher(object):
+    """Resumable matcher over chunked input.
+
+    Wraps a DFA or an NFA, and takes its input through any number of feed()
+    calls, keeping only the current state between them. Chunks can be str
+    or bytes-like objects (bytes, bytearray, memoryview, mmap), where every
+    byte is read as the Latin-1 char of the same value. Whether the input
+    fed so far is accepted can be queried at any time.
+
+    Attributes:
+        engine - CompiledDFA or BitNFA, the automata to run
+        state  - int, current DFA state number or NFA state mask
+        count  - int, number of symbols fed so far
+    """
+
+    def __init__(self, input_fa):
+        if isinstance(input_fa, nfa.NFiniteAutomata):
+            self.engine = input_fa.bitNFA()
+        elif isinstance(input_fa, dfa.DFiniteAutomata):
+            self.engine = input_fa.compile()
+        else:   # Already a CompiledDFA or BitNFA
+            self.engine = input_fa
+        self.reset()
+
+    def reset(self):
+        """Goes back to the initial state, as if nothing has been fed.
+        """
+        self.state, self.count = self.engine.initial, 0
+
+    def feed(self, chunk):
+        """Feeds a chunk of input.
+
+        Args:
+            chunk - str or bytes-like, the next piece of input
+
+        Returns:
+            self, so that calls can be chained
+        """
+        self.state = self.engine.advance(self.state, chunk)
+        if type(chunk) == str:
+            self.count += len(chunk)
+        else:
+            self.count += memoryview(chunk).nbytes
+        return self
+
+    def feedAll(self, source, chunk_size=65536):
+        """Feeds everything from a file-like object or an iterable.
+
+        Objects with a read() method are read CHUNK_SIZE at a time, others
+        are iterated over and every item is fed as a chunk, e.g. the lines
+        of a file opened in text mode. Stops early once the matcher is dead.
+
+        Args:
+            source     - file-like or iterable, where the input comes from
+            chunk_size - int, size of a read() call
+
+        Returns:
+            self, so that calls can be chained
+        """
+        if hasattr(source, 'read'):
+            chunk = source.read(chunk_size)
+            while len(chunk) > 0 and not self.is_dead:
+                self.feed(chunk)
+                chunk = source.read(chunk_size)
+        else:
+            for chunk in source:
+                if self.is_dead:
+                    break
+                self.feed(chunk)
+        return self
+
+    @property
+    def is_accepting(self):
+        """True iff the input fed so far is accepted."""
+        return self.engine.isAccepting(self.state)
+
+    @property
+    def is_dead(self):
+        """True iff the engine is in its dead sink (or empty set of states),
+        after which no input can be accepted. Trap states of a DFA which is
+        not minimized are not detected.
+        """
+        return self.engine.isDead(self.state)
+
+if __name__ == '__main__':
+    min_dfa = dfa.DFiniteAutomata(ere.Regex('(a|~)*b*a|ba')).minimalDFA()
+    matcher = StreamMatcher(min_dfa)
+    for chunk in ['aab', b'bb', memoryview(b'a')]:
+        matcher.feed(chunk)
+        print(matcher.count, matcher.is_accepting, matcher.is_dead)
+    matcher.feed('b')
+    print(matcher.count, matcher.is_accepting, matcher.is_dead)
+
+    matcher = StreamMatcher(nfa.NFiniteAutomata(ere.Regex('[a-c]+b*|a')))
+    print(matcher.feedAll(iter(['acb', 'abb', 'b'])).is_accepting)
@@ -0,0 +1,324 @@
+##############################################################################
+# Author: Jose, Robert & King                                                #
+#  Date:  2019.01.15                                                         #
+##############################################################################
+
+from array import array
+import os
+import struct
+import sys
+import tempfile
+
+MAGIC   = b'PREFATAB'
+VERSION = 1
+HEADER  = struct.Struct('<8sHHIIqQQ')
+
+# The process umask, read once at import, since reading it means setting it
+# for a moment, which would race with threads creating files.
+_umask = os.umask(0)
+os.umask(_umask)
+
+class Table(object):
+    """Automaton table read from a file, over state and symbol numbers.
+
+    States are numbered in the order of their rows, and symbols in the
+    sorted order of the alphabet. Every non-empty cell is kept as edges in
+    flat arrays, one per target state, so that no dict or set is made per
+    state.
+
+    Attributes:
+        alphabet  - list     , symbols in sorted order
+        states    - list     , state names, indexed by state number
+        initial   - int      , the initial state number, -1 if none
+        accepting - bytearray, accepting flag of every state number
+        src       - array    , source state number of every edge
+        sym       - array    , symbol number in ALPHABET of every edge
+        dst       - array    , target state number of every edge
+    """
+
+    def __init__(self, alphabet, states, initial, accepting, src, sym, dst):
+        self.alphabet, self.states = alphabet, states
+        self.initial, self.accepting = initial, accepting
+        self.src, self.sym, self.dst = src, sym, dst
+
+def _parseCell(cell):
+    """Splits a cell into its target state names.
+
+    Args:
+        cell - str, '-', a state name, or '{name,name,...}'
+
+    Returns:
+        list, the distinct target names, None if the cell is malformed
+    """
+    if cell == '-':
+        return []
+    if cell[0] == '{' and cell[-1] == '}':
+        names = list(dict.fromkeys(cell[1:-1].split(',')))
+    else:
+        names = [cell]
+    for name in names:
+        if name == '' or name == '-' or '{' in name or '}' in name or \
+           ',' in name:
+            return None
+    return names
+
+def readText(path, deterministic=False):
+    """Reads an automaton table file in the text format.
+
+    The format is the one described in fa.FiniteAutomata: a line of the
+    alphabet, then a row per state of its name, a cell per symbol, and
+    optional flags, 'i' for initial and 'a' for accepting. Blank lines are
+    skipped. The file is parsed line by line straight into a Table, and
+    only the name-number table of states is kept besides the edge arrays,
+    so that tables of millions of states load within bounded memory.
+
+    Args:
+        path          - str , path of the file
+        deterministic - Bool, whether a cell of more than one state is an
+                              error
+
+    Returns:
+        Table, the automaton table
+
+    Raises:
+        ValueError, at the first malformed line, telling its line number
+    """
+    with open(path) as f:
+        columns = f.readline().split()
+        if len(columns) == 0:
+            raise ValueError('Missing alphabet at line 1 of %s' % path)
+        alphabet = sorted(set(columns))
+        if len(alphabet) != len(columns):
+            raise ValueError('Duplicate symbol at line 1 of %s' % path)
+        sym_of = [alphabet.index(a) for a in columns]
+        k = len(columns)
+
+        # States are given ids in the order they are first met, as rows or
+        # as targets, and ROW_OF[id] is the row number once the row is read.
+        # In files named in BFS order, ids and rows are the same, and then
+        # the targets need no renumbering.
+        number, names, row_of, seen_at = {}, [], array('l'), array('l')
+        src, sym, dst = array('l'), array('l'), array('l')
+        initial, accepting, in_order = -1, bytearray(), True
+        for line_no, raw_line in enumerate(f, 2):
+            line = raw_line.split()
+            if len(line) == 0:
+                continue
+            if len(line) != k + 1 and len(line) != k + 2:
+                raise ValueError('Expected a state, %d cells and flags, got '
+                                 '%d fields at line %d of %s'
+                                 % (k, len(line), line_no, path))
+            u, name = len(accepting), line[0]
+            if _parseCell(name) != [name]:
+                raise ValueError('Malformed state %r at line %d of %s'
+                                 % (name, line_no, path))
+            v = number.get(name)
+            if v is None:
+                v = number[name] = len(names)
+                names.append(name)
+                row_of.append(u)
+                seen_at.append(line_no)
+            elif row_of[v] >= 0:
+                raise ValueError('Duplicate state %s at line %d of %s'
+                                 % (name, line_no, path))
+            else:
+                row_of[v] = u
+            in_order = in_order and v == u
+            for j in range(k):
+                cell = line[j+1]
+                if cell == '-':
+                    continue
+                if cell[0] == '{' or ',' in cell or '}' in cell:
+                    targets = _parseCell(cell)
+                    if targets is None:
+                        raise ValueError('Malformed cell %r at line %d of %s'
+                                         % (cell, line_no, path))
+                    if deterministic and len(targets) > 1:
+                        raise ValueError('State %s moves to more than one '
+                                         'state on %s at line %d of %s'
+                                         % (name, columns[j], line_no, path))
+                else:               # A single name, the usual case
+                    targets = (cell,)
+                for target in targets:
+                    v = number.get(target)
+                    if v is None:
+                        v = number[target] = len(names)
+                        names.append(target)
+                        row_of.append(-1)
+                        seen_at.append(line_no)
+                    src.append(u)
+                    sym.append(sym_of[j])
+                    dst.append(v)
+            flags = line[k+1] if len(line) == k + 2 else ''
+            if len(flags.strip('ia')) > 0:
+                raise ValueError('Unknown flags %r at line %d of %s'
+                                 % (flags, line_no, path))
+            if 'i' in flags:
+                if initial >= 0:
+                    raise ValueError('More than one initial state at line %d '
+                                     'of %s' % (line_no, path))
+                initial = u
+            accepting.append(1 if 'a' in flags else 0)
+
+    for v in range(len(names)):
+        if row_of[v] < 0:
+            raise ValueError('Unknown state %s at line %d of %s'
+                             % (names[v], seen_at[v], path))
+    if not in_order:
+        states = [None] * len(names)
+        for v, name in enumerate(names):
+            states[row_of[v]] = name
+        for e in range(len(dst)):
+            dst[e] = row_of[dst[e]]
+        names = states
+    return Table(alphabet, names, initial, accepting, src, sym, dst)
+
+def _readArray(f, typecode, count):
+    """Reads COUNT little-endian items of an array from a file."""
+    items = array(typecode)
+    try:
+        items.fromfile(f, count)
+    except (EOFError, ValueError):  # ValueError if it stops inside an item
+        raise ValueError('Truncated table data')
+    if sys.byteorder != 'little':
+        items.byteswap()
+    return items
+
+def readBinary(path):
+    """Reads an automaton table file in the binary format, see write().
+
+    The edge arrays are read straight into `array`s, without parsing or
+    intermediate copies.
+
+    Args:
+        path - str, path of the file
+
+    Returns:
+        Table, the automaton table
+
+    Raises:
+        ValueError, if the file is not a valid table
+    """
+    with open(path, 'rb') as f:
+        head = f.read(HEADER.size)
+        if len(head) < HEADER.size:
+            raise ValueError('Truncated table data')
+        magic, version, _, n, k, initial, m, names_len = HEADER.unpack(head)
+        if magic != MAGIC:
+            raise ValueError('Not a prefa table')
+        if version != VERSION:
+            raise ValueError('Unsupported table format version %d' % version)
+        alphabet = []
+        for _ in range(k):
+            length = _readArray(f, 'H', 1)[0]
+            alphabet.append(f.read(length).decode('utf-8', 'surrogatepass'))
+        data = f.read(names_len)
+        accepting = bytearray(f.read(n))
+        if len(data) != names_len or len(accepting) != n:
+            raise ValueError('Truncated table data')
+        states = data.decode('utf-8').split('\n') if n > 0 else []
+        src, sym, dst = [_readArray(f, 'i', m) for _ in range(3)]
+    if len(states) != n or not -1 <= initial < n or \
+       (m > 0 and (min(src) < 0 or max(src) >= n or min(dst) < 0 or
+                   max(dst) >= n or min(sym) < 0 or max(sym) >= k)):
+        raise ValueError('Corrupted table data')
+    return Table(alphabet, states, initial, accepting, src, sym, dst)
+
+def read(path, deterministic=False):
+    """Reads an automaton table file, in the binary or the text format.
+
+    Args:
+        path          - str , path of the file
+        deterministic - Bool, whether a cell of more than one state is an
+                              error in a text file
+
+    Returns:
+        Table, the automaton table
+    """
+    with open(path, 'rb') as f:
+        binary = f.read(len(MAGIC)) == MAGIC
+    return readBinary(path) if binary else readText(path, deterministic)
+
+def writeAtomically(path, writer):
+    """Writes a file through a temporary one, then atomically replaces PATH
+    by it, so that readers never see a partly written file.
+
+    The file gets the permissions open() would give a new file, i.e. 0666
+    less the umask, rather than the owner-only ones of tempfile.mkstemp().
+
+    Args:
+        path   - str     , path of the file
+        writer - callable, called with the temporary file, opened in 'wb'
+                           mode, to write the content
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            writer(f)
+        os.chmod(tmp_path, 0o666 & ~_umask)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def write(table, path):
+    """Writes a Table into a file in the binary format, atomically replacing
+    it.
+
+    The layout is, all in little-endian:
+
+        header   - magic, format version, reserved, state count N, symbol
+                   count K, initial state (-1 if none), edge count M, byte
+                   length of the names block
+        alphabet - every symbol as a u16 length and its UTF-8 bytes
+        names    - state names, joined by newlines, in UTF-8
+        accepts  - N bytes, accepting flag of every state number
+        edges    - M int32 source states, M int32 symbols, then M int32
+                   target states
+
+    Args:
+        table - Table, the automaton table
+        path  - str, path of the file
+    """
+    names = '\n'.join(table.states).encode('utf-8')
+
+    def writer(f):
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(table.states),
+                            len(table.alphabet), table.initial,
+                            len(table.src), len(names)))
+        for a in table.alphabet:
+            code = a.encode('utf-8', 'surrogatepass')
+            f.write(struct.pack('<H', len(code)) + code)
+        f.write(names)
+        f.write(bytes(table.accepting))
+        for edges in (table.src, table.sym, table.dst):
+            edges = array('i', edges)
+            if sys.byteorder != 'little':
+                edges.byteswap()
+            edges.tofile(f)
+
+    writeAtomically(path, writer)
+
+def convert(text_path, binary_path):
+    """Converts a table file from the text format into the binary one.
+
+    Args:
+        text_path   - str, path of the text file, e.g. 'input/DFA'
+        binary_path - str, path of the binary file to write
+    """
+    write(readText(text_path), binary_path)
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3:      # python -m prefa.tables TEXT BINARY
+        convert(sys.argv[1], sys.argv[2])
+    else:
+        from prefa import dfa, nfa
+        directory = tempfile.mkdtemp()
+        for name in ('DFA', 'NFA'):
+            path = os.path.join(directory, name + '.tab')
+            convert(os.path.join('..', 'input', name), path)
+            table = read(path)
+            print(name, table.states, table.initial, list(table.accepting))
+        print(dfa.DFiniteAutomata(os.path.join(directory, 'DFA.tab')))
+        print(nfa.NFiniteAutomata(os.path.join(directory, 'NFA.tab')))
@@ -1,8 +1,16 @@
 from setuptools import setup
+import os
+import re
+
+# The version is kept only in prefa/__init__.py, which the disk cache keys of
+# prefa.store also depend on.
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'prefa',
+                       '__init__.py')) as f:
+    version = re.search(r"^__version__ = '([^']*)'", f.read(), re.M).group(1)
 
 setup (
     name = 'prefa',
-    version = '2.3.4',
+    version = version,
     author = 'Jose, Robert & King',
     author_email = "huguanzhou123@sina.com",
     description = 'Presentation tool for Regular Expressions and Finite Automatas',
@@ -1,22 +1,20 @@
-from prefa import dfa, ere
+from prefa import lexer
 
 class Lexer(object):
     """Simple example of a toy lexer.
 
-    Using a bunch of recognizers (which are minimal DFAs) to perform very
-    simple lexing analysis.
+    Uses one combined maximal munch DFA built from all the lexing rules (see
+    `prefa.lexer`) to perform very simple lexing analysis.
     """
 
     def __init__(self, rules):
-        self.recognizers = dict([(r, dfa.DFiniteAutomata(ere.Regex(rules[r])) \
-                                     .minimalDFA()) for r in rules])
+        self.engine = lexer.Lexer(rules)
 
     def tokenize(self, input_str):
         """Tokenize the input string.
 
-        Tokenize the input string according to the lexing rules. First split
-        the input according to whitespaces, then check every element using
-        the recognizers.
+        Tokenize the input string according to the lexing rules, in one
+        left-to-right pass taking the longest token at every step.
 
         Args:
             input_str - str, the string to perform lexing
@@ -24,16 +22,9 @@ class Lexer(object):
         Returns:
             output_str - str, the result of tokenizing
         """
-        elements, output_str = input_str.strip().split(), ''
-        for s in elements:
-            match_flag = False
-            for r in self.recognizers:
-                if self.recognizers[r].simulate(s):
-                    output_str += '%10s:  %s\n' % (r, s)
-                    match_flag = True
-                    break
-            if not match_flag:  # Will raise ValueError if no matching.
-                raise ValueError('No matching rule for %r' % s)
+        output_str = ''
+        for kind, start, end in self.engine.tokenize(input_str):
+            output_str += '%10s:  %s\n' % (kind, input_str[start:end])
         print(output_str)
 
 if __name__ == '__main__':
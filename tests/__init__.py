@@ -0,0 +1,2 @@
+# Differential tests of prefa, run with `python -m pytest tests` or
+# `python -m unittest discover tests`
@@ -0,0 +1,84 @@
+##############################################################################
+# Author: Jose, Robert & King                                                #
+#  Date:  2019.01.15                                                         #
+##############################################################################
+
+from prefa import fa
+import re
+import unittest
+
+ALPHABET = 'abc'
+
+def randomRegex(rng, depth=3):
+    """Makes a random Regular Expression, in the syntax shared by prefa and
+    Python's `re`.
+
+    Args:
+        rng   - Random, the random source
+        depth - int, how deep the syntax tree may go
+
+    Returns:
+        str, the Regular Expression
+    """
+    if depth == 0 or rng.random() < 0.25:
+        return rng.choice(list(ALPHABET) + ['[a-b]', '[b-c]', '[^a]'])
+    kind = rng.choice(['-', '-', '|', '*', '+', '?', '{}'])
+    if kind == '-':
+        return randomRegex(rng, depth - 1) + randomRegex(rng, depth - 1)
+    if kind == '|':
+        return '(' + randomRegex(rng, depth - 1) + '|' + \
+               randomRegex(rng, depth - 1) + ')'
+    inner = '(' + randomRegex(rng, depth - 1) + ')'
+    if kind == '{}':
+        low = rng.randrange(3)
+        return inner + rng.choice(['{%d}' % low,
+                                   '{%d,%d}' % (low, low + rng.randrange(3))])
+    return inner + kind
+
+def randomText(rng, max_length=8, alphabet=ALPHABET + 'd'):
+    """Makes a random text over ALPHABET, plus one symbol out of it.
+
+    Args:
+        rng        - Random, the random source
+        max_length - int, longest text to make
+        alphabet   - str, symbols to pick from
+
+    Returns:
+        str, the text
+    """
+    return ''.join([rng.choice(alphabet)
+                    for _ in range(rng.randrange(max_length + 1))])
+
+def leftmostLongest(pattern, text, pos=0):
+    """Finds the leftmost-longest match by brute force with `re`.
+
+    Args:
+        pattern - str, the Regular Expression
+        text    - str, the text to search
+        pos     - int, where the search starts
+
+    Returns:
+        (start, end) - tuple, or None if no match
+    """
+    regex = re.compile(pattern)
+    for start in range(pos, len(text) + 1):
+        ends = [end for end in range(start, len(text) + 1)
+                if regex.fullmatch(text, start, end)]
+        if len(ends) > 0:
+            return start, max(ends)
+    return None
+
+class TestCase(unittest.TestCase):
+    """TestCase with differential checks of matching engines."""
+
+    def assertAgrees(self, engines, pattern, baseline, rng, count=20):
+        """Checks every engine on random texts, str and bytes alike."""
+        for _ in range(count):
+            text = randomText(rng)
+            expected = re.fullmatch(pattern, text) is not None
+            self.assertEqual(fa.FiniteAutomata.simulate(baseline, text),
+                             expected, (pattern, text))
+            for name, match in engines.items():
+                self.assertEqual(match(text), expected, (name, pattern, text))
+                self.assertEqual(match(text.encode()), expected,
+                                 (name, pattern, text))
@@ -0,0 +1,62 @@
+##############################################################################
+# Author: Jose, Robert & King                                                #
+#  Date:  2019.01.15                                                         #
+##############################################################################
+
+from prefa import ere, nfa, cache
+from tests import helpers
+import random
+import unittest
+
+class TestCache(helpers.TestCase):
+    """Cached automata against `re`, and the sharing of cache entries."""
+
+    def setUp(self):
+        cache.purge()
+
+    def tearDown(self):
+        cache.setCacheSize(512)
+        cache.purge()
+
+    def testMatches(self):
+        rng = random.Random(15)
+        for _ in range(60):
+            pattern = helpers.randomRegex(rng)
+            self.assertAgrees({'dfa': cache.compile(pattern).match,
+                               'nfa': cache.compile(pattern, 'nfa').match},
+                              pattern, nfa.NFiniteAutomata(ere.Regex(pattern)),
+                              rng)
+
+    def testSharing(self):
+        compiled = cache.compile('a(b|c)*')
+        self.assertIs(cache.compile('a(b|c)*'), compiled)
+        self.assertIsNot(cache.compile('a(b|c)*', 'nfa'), compiled)
+        self.assertEqual(cache.cacheInfo(),
+                         {'hits': 1, 'misses': 2, 'size': 2, 'maxsize': 512})
+        with self.assertRaises(TypeError):
+            compiled.accepting[0] = 1
+        with self.assertRaises(AttributeError):
+            compiled.initial = 0
+        with self.assertRaises(TypeError):
+            cache.compile('a(b|c)*', 'nfa').moves['a'] = ()
+        with self.assertRaises(ValueError):
+            cache.compile('a', 'lazy')
+
+        cache.setCacheSize(1)
+        self.assertEqual(cache.cacheInfo()['size'], 1)
+        self.assertIsNot(cache.compile('a(b|c)*'), compiled)
+        cache.setCacheSize(0)
+        self.assertIsNot(cache.compile('b'), cache.compile('b'))
+        self.assertEqual(cache.cacheInfo()['size'], 0)
+
+    def testLazySearcher(self):
+        # The reverse DFA of this one has 2^15 states, only made if needed
+        compiled = cache.compile('(a|b){14}a(a|b)*')
+        self.assertIsNone(compiled._searcher)
+        self.assertTrue(compiled.match('b' * 14 + 'ab'))
+        self.assertIsNone(compiled._searcher)
+        self.assertEqual(cache.compile('ab*').search('cabbc'), (1, 4))
+        self.assertIsNotNone(cache.compile('ab*')._searcher)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+##############################################################################
+# Author: Jose, Robert & King                                                #
+#  Date:  2019.01.15                                                         #
+##############################################################################
+
+from prefa import ere, nfa, dfa
+from tests import helpers
+import os
+import pickle
+import random
+import tempfile
+import unittest
+try:
+    import numpy
+except ImportError:     # matchMany() needs NumPy
+    numpy = None
+
+class TestDFA(helpers.TestCase):
+    """DFA engines against `re` and the set-based simulate() of the baseline
+    FiniteAutomata, on random Regular Expressions and strings.
+    """
+
+    def testCompiled(self):
+        rng = random.Random(2019)
+        for _ in range(100):
+            pattern = helpers.randomRegex(rng)
+            regex = ere.Regex(pattern)
+            my_dfa = dfa.DFiniteAutomata(regex)
+            compiled = my_dfa.compile()
+            engines = {'dfa':      my_dfa.simulate,
+                       'compiled': compiled.match,
+                       'pickled':  pickle.loads(pickle.dumps(compiled)).match}
+            self.assertAgrees(engines, pattern, nfa.NFiniteAutomata(regex),
+                              rng)
+            with self.assertRaises(TypeError):
+                compiled.table[0] = compiled.dead
+
+    def testMinimal(self):
+        rng = random.Random(7)
+        for _ in range(60):
+            pattern = helpers.randomRegex(rng)
+            regex = ere.Regex(pattern)
+            thompson = nfa.NFiniteAutomata(regex)
+            min_dfa = dfa.DFiniteAutomata(regex).minimalDFA()
+            self.assertAgrees({'minimal': min_dfa.simulate,
+                               'compiled': min_dfa.compile().match},
+                              pattern, thompson, rng)
+            self.assertEqual(len(min_dfa.minimalDFA().states),
+                             len(min_dfa.states))
+            from_nfa = dfa.DFiniteAutomata(thompson).minimalDFA()
+            self.assertEqual(len(from_nfa.states), len(min_dfa.states))
+
+    def testLazy(self):
+        rng = random.Random(5)
+        for _ in range(60):
+            pattern = helpers.randomRegex(rng)
+            thompson = nfa.NFiniteAutomata(ere.Regex(pattern))
+            lazies = [dfa.LazyDFA(thompson, max_states, policy)
+                      for max_states in (1, 3, 4096)
+                      for policy in ('clear', 'lru')]
+            self.assertAgrees(dict([('%d %s' % (lazy.max_states, lazy.policy),
+                                     lazy.match) for lazy in lazies]),
+                              pattern, thompson, rng)
+            for lazy in lazies:
+                self.assertLessEqual(len(lazy.cache), lazy.max_states)
+
+    def testTildeSymbol(self):
+        # '~' is a normal symbol in a DFA, not epsilon
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'DFA')
+        with open(path, 'w') as f:
+            f.write('a ~\nS0 S1 - i\nS1 - S2\nS2 - - a\n')
+        try:
+            my_dfa = dfa.DFiniteAutomata(path)
+        finally:
+            os.remove(path)
+            os.rmdir(directory)
+        engines = [my_dfa.simulate, my_dfa.minimalDFA().simulate,
+                   my_dfa.compile().match]
+        for text, expected in [('a~', True), (b'a~', True), ('a', False),
+                               ('~', False), ('a~~', False)]:
+            for match in engines:
+                self.assertEqual(match(text), expected, text)
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def testMatchMany(self):
+        rng = random.Random(9)
+        for _ in range(30):
+            regex = ere.Regex(helpers.randomRegex(rng))
+            compiled = dfa.DFiniteAutomata(regex).minimalDFA().compile()
+            texts = [helpers.randomText(rng) for _ in range(50)]
+            expected = [compiled.match(text) for text in texts]
+            self.assertEqual(list(compiled.matchMany(texts, 7)), expected)
+            self.assertEqual(list(compiled.matchMany([text.encode() for text
+                                                      in texts], 7)),
+                             expected)
+        for mixed in (['ab', b'ab'], [b'ab', 'ab'], [bytearray(b'a'), 'a']):
+            with self.assertRaises(TypeError) as raised:
+                compiled.matchMany(mixed)
+            self.assertEqual(str(raised.exception), 'matchMany takes all str '
+                             'or all bytes-like strings')
+
+if __name__ == '__main__':
+    unittest.main()
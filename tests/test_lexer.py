@@ -0,0 +1,65 @@
+##############################################################################
+# Author: Jose, Robert & King                                                #
+#  Date:  2019.01.15                                                         #
+##############################################################################
+
+from prefa import ere, nfa, dfa, lexer
+import random
+import re
+import unittest
+
+RULES = [('IF', 'if'), ('ID', '[a-z]+'), ('INT', '[0-9]+'),
+         ('FLOAT', '[0-9]+\\.[0-9]+'), ('LE', '<='), ('LT', '<'),
+         ('ASSIGN', '=')]
+
+def tokenize(rules, text):
+    """Maximal munch with rule priority, by brute force with `re`."""
+    tokens, pos = [], 0
+    while pos < len(text):
+        if text[pos].isspace():
+            pos += 1
+            continue
+        for end in range(len(text), pos, -1):
+            kinds = [kind for kind, pattern in rules
+                     if re.fullmatch(pattern, text[pos:end])]
+            if len(kinds) > 0:
+                tokens.append((kinds[0], pos, end))
+                pos = end
+                break
+        else:
+            raise ValueError('No matching rule at position %d' % pos)
+    return tokens
+
+class TestLexer(unittest.TestCase):
+    """Lexer tokens against a brute-force maximal munch lexer."""
+
+    def testTokens(self):
+        rng = random.Random(3)
+        my_lexer = lexer.Lexer(RULES)
+        pieces = ['if', 'ifx', 'x', 'abc', '12', '3.5', '4.', '<', '<=',
+                  '=', ' ', '  ', '\n']
+        for _ in range(200):
+            text = ''.join([rng.choice(pieces) for _ in range(8)])
+            try:
+                expected = tokenize(RULES, text)
+            except ValueError as error:
+                with self.assertRaises(ValueError) as raised:
+                    list(my_lexer.tokenize(text))
+                self.assertEqual(str(raised.exception), str(error))
+                continue
+            self.assertEqual(list(my_lexer.tokenize(text)), expected, text)
+            self.assertEqual(list(my_lexer.tokenize(text.encode())),
+                             expected, text)
+
+    def testCompileUnionLeavesRegexes(self):
+        first, second = ere.Regex('x+'), ere.Regex('ab*')
+        matcher, tags = dfa.compileUnion([first, second])
+        self.assertTrue(matcher.match('xx') and matcher.match('abb'))
+        for regex, text in [(first, 'xxx'), (second, 'abb')]:
+            self.assertTrue(dfa.DFiniteAutomata(regex).minimalDFA()
+                            .compile().match(text))
+            self.assertTrue(nfa.NFiniteAutomata(regex, 'glushkov')
+                            .simulate(text))
+
+if __name__ == '__main__':
+    unittest.main()
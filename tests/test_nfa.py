@@ -0,0 +1,66 @@
+##############################################################################
+# Author: Jose, Robert & King                                                #
+#  Date:  2019.01.15                                                         #
+##############################################################################
+
+from prefa import ere, nfa, dfa
+from tests import helpers
+import pickle
+import random
+import unittest
+
+class TestNFA(helpers.TestCase):
+    """NFA engines against `re` and the set-based simulate() of the baseline
+    FiniteAutomata, on random Regular Expressions and strings.
+    """
+
+    def testBitNFA(self):
+        rng = random.Random(6)
+        for _ in range(80):
+            pattern = helpers.randomRegex(rng)
+            thompson = nfa.NFiniteAutomata(ere.Regex(pattern))
+            bit_nfa = thompson.bitNFA()
+            self.assertAgrees({'bit_nfa': bit_nfa.match,
+                               'pickled': pickle.loads(pickle.dumps(bit_nfa))
+                                          .match}, pattern, thompson, rng)
+            S, mask = thompson.epsClosure(thompson.initial), bit_nfa.initial
+            symbols = sorted(bit_nfa.moves)
+            for _ in range(rng.randrange(6) if len(symbols) > 0 else 0):
+                a = rng.choice(symbols)
+                self.assertEqual(bit_nfa.toSet(mask), set(S))
+                S = thompson.epsClosure(thompson.move(S, a))
+                mask = bit_nfa.step(mask, a)
+            self.assertEqual(bit_nfa.toSet(mask), set(S))
+            with self.assertRaises(AttributeError):
+                bit_nfa.accept = 0
+
+    def testThompson(self):
+        rng = random.Random(20)
+        for _ in range(80):
+            pattern = helpers.randomRegex(rng)
+            thompson = nfa.NFiniteAutomata(ere.Regex(pattern))
+            self.assertAgrees({'thompson': thompson.simulate,
+                               'nfa_dfa': dfa.DFiniteAutomata(thompson)
+                                          .simulate}, pattern, thompson, rng)
+            self.assertEqual(thompson.initial, 's0')
+            self.assertEqual(thompson.acceptings, set(['sf']))
+            self.assertEqual(thompson.states[:-1],
+                             ['s%d' % i for i in
+                              range(len(thompson.states) - 1)])
+
+    def testGlushkov(self):
+        rng = random.Random(21)
+        for _ in range(80):
+            pattern = helpers.randomRegex(rng)
+            regex = ere.Regex(pattern)
+            glushkov = nfa.NFiniteAutomata(regex, method='glushkov')
+            self.assertAgrees({'glushkov': glushkov.simulate,
+                               'bit_nfa': glushkov.bitNFA().match,
+                               'nfa_dfa': dfa.DFiniteAutomata(glushkov)
+                                          .simulate},
+                              pattern, nfa.NFiniteAutomata(regex), rng)
+            for s in glushkov.states:   # No epsilon moves at all
+                self.assertEqual(glushkov.epsClosure(s), set([s]))
+
+if __name__ == '__main__':
+    unittest.main()
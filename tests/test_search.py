@@ -0,0 +1,81 @@
+##############################################################################
+# Author: Jose, Robert & King                                                #
+#  Date:  2019.01.15                                                         #
+##############################################################################
+
+from prefa import ere, dfa, search
+from tests import helpers
+import random
+import sys
+import threading
+import unittest
+
+def compiled(pattern):
+    return dfa.DFiniteAutomata(ere.Regex(pattern)).minimalDFA().compile()
+
+def finditer(pattern, text):
+    """Non-overlapping leftmost-longest spans by brute force."""
+    spans, pos = [], 0
+    while pos <= len(text):
+        span = helpers.leftmostLongest(pattern, text, pos)
+        if span is None:
+            break
+        spans.append(span)
+        pos = span[1] if span[1] > span[0] else span[1] + 1
+    return spans
+
+class TestSearch(unittest.TestCase):
+    """Search spans against a brute-force leftmost-longest search."""
+
+    def testSpans(self):
+        rng = random.Random(11)
+        for _ in range(60):
+            pattern = helpers.randomRegex(rng)
+            matcher = compiled(pattern)
+            for max_states in (1, 4096):
+                searcher = search.Searcher(matcher, max_states)
+                for _ in range(10):
+                    text = helpers.randomText(rng, 12)
+                    self.assertEqual(searcher.search(text),
+                                     helpers.leftmostLongest(pattern, text),
+                                     (pattern, text, max_states))
+                    self.assertEqual(list(searcher.finditer(text.encode())),
+                                     finditer(pattern, text),
+                                     (pattern, text, max_states))
+
+    def testSharedByThreads(self):
+        rng = random.Random(5)
+        pattern = '(ab|ba)+c?'
+        matcher = compiled(pattern)
+        texts = [helpers.randomText(rng, 200) for _ in range(20)]
+        expected = [finditer(pattern, text) for text in texts]
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)     # Switch threads as often as can be
+        try:
+            for max_states in (1, 2, 3):
+                searcher = search.Searcher(matcher, max_states)
+                errors = []
+
+                def work():
+                    try:
+                        for _ in range(5):
+                            for text, spans in zip(texts, expected):
+                                if list(searcher.finditer(text)) != spans:
+                                    errors.append(text)
+                    except Exception as error:
+                        errors.append(error)
+
+                threads = [threading.Thread(target=work) for _ in range(6)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                self.assertEqual(errors, [], max_states)
+                self.assertGreater(searcher.stats['flushes'], 0)
+                self.assertLessEqual(len(searcher.states.keys),
+                                     max_states + 2)
+        finally:
+            sys.setswitchinterval(interval)
+
+if __name__ == '__main__':
+    unittest.main()
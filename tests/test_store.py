@@ -0,0 +1,70 @@
+##############################################################################
+# Author: Jose, Robert & King                                                #
+#  Date:  2019.01.15                                                         #
+##############################################################################
+
+from prefa import ere, dfa, store
+from tests import helpers
+import os
+import random
+import shutil
+import struct
+import tempfile
+import unittest
+
+class TestStore(unittest.TestCase):
+    """Round trips of compiled matchers, and corrupted or truncated data."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testRoundTrip(self):
+        rng = random.Random(13)
+        for i in range(40):
+            pattern = helpers.randomRegex(rng)
+            matcher = dfa.DFiniteAutomata(ere.Regex(pattern)).minimalDFA() \
+                         .compile()
+            path = os.path.join(self.directory, '%d.dfa' % i)
+            store.dump(matcher, path)
+            copies = [store.loads(store.dumps(matcher)), store.load(path)]
+            for _ in range(20):
+                text = helpers.randomText(rng)
+                for copy in copies:
+                    self.assertEqual(copy.match(text), matcher.match(text),
+                                     (pattern, text))
+
+    def testCorruption(self):
+        matcher = dfa.DFiniteAutomata(ere.Regex('(a|b)*abb')).minimalDFA() \
+                     .compile()
+        data = store.dumps(matcher)
+        bad_target = bytearray(data)
+        struct.pack_into('<i', bad_target, len(data) - 4, 999)
+        bad_initial = bytearray(data)
+        struct.pack_into('<I', bad_initial, 20, 999)
+        for bad in (bad_target, bad_initial):
+            with self.assertRaises(ValueError) as raised:
+                store.loads(bytes(bad))
+            self.assertEqual(str(raised.exception),
+                             'Corrupted automaton data')
+        with self.assertRaises(ValueError):
+            store.loads(b'NOTADFA!' + data[8:])
+        for length in range(len(data)):
+            with self.assertRaises(ValueError):
+                store.loads(data[:length])
+
+    def testDiskCacheRebuilds(self):
+        disk_cache = store.DiskCache(self.directory)
+        matcher = disk_cache.compile('ab*')
+        path = disk_cache.pathOf('ab*')
+        with open(path, 'r+b') as f:
+            f.truncate(10)
+        again = store.DiskCache(self.directory).compile('ab*')
+        for text in ('a', 'abbb', 'b', ''):
+            self.assertEqual(again.match(text), matcher.match(text))
+        self.assertTrue(store.load(path).match('ab'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+##############################################################################
+# Author: Jose, Robert & King                                                #
+#  Date:  2019.01.15                                                         #
+##############################################################################
+
+from prefa import ere, nfa, dfa, stream
+from tests import helpers
+import io
+import random
+import re
+import unittest
+
+class TestStream(unittest.TestCase):
+    """Chunked input against matching the whole text at once."""
+
+    def testChunks(self):
+        rng = random.Random(8)
+        for _ in range(60):
+            pattern = helpers.randomRegex(rng)
+            regex = ere.Regex(pattern)
+            automata = [dfa.DFiniteAutomata(regex).minimalDFA(),
+                        nfa.NFiniteAutomata(regex)]
+            for _ in range(10):
+                text = helpers.randomText(rng, 12)
+                expected = re.fullmatch(pattern, text) is not None
+                cuts = sorted([rng.randrange(len(text) + 1)
+                               for _ in range(3)])
+                chunks = [text[i:j] for i, j in
+                          zip([0] + cuts, cuts + [len(text)])]
+                for automaton in automata:
+                    matcher = stream.StreamMatcher(automaton)
+                    for k, chunk in enumerate(chunks):
+                        kind = (str, bytes, memoryview)[k % 3]
+                        matcher.feed(chunk if kind == str else
+                                     kind(chunk.encode()))
+                    self.assertEqual(matcher.count, len(text))
+                    self.assertEqual(matcher.is_accepting, expected,
+                                     (pattern, text, automaton))
+                    if matcher.is_dead:     # No suffix can be accepted
+                        for suffix in ['', 'a', 'b', 'c', 'ab', 'abc']:
+                            self.assertIsNone(re.fullmatch(pattern,
+                                                           text + suffix))
+                    read = stream.StreamMatcher(automaton) \
+                                 .feedAll(io.BytesIO(text.encode()), 2)
+                    if not read.is_dead:
+                        self.assertEqual(read.is_accepting, expected)
+                    matcher.reset()
+                    self.assertEqual(matcher.count, 0)
+                    self.assertEqual(matcher.feed(text).is_accepting,
+                                     expected)
+
+if __name__ == '__main__':
+    unittest.main()
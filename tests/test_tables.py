@@ -0,0 +1,123 @@
+##############################################################################
+# Author: Jose, Robert & King                                                #
+#  Date:  2019.01.15                                                         #
+##############################################################################
+
+from prefa import ere, fa, nfa, dfa, tables, store
+from tests import helpers
+import os
+import random
+import shutil
+import stat
+import tempfile
+import unittest
+
+INPUT = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'input')
+
+class TestTables(unittest.TestCase):
+    """Loading of table files, text and binary, and their errors."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, text, name='table'):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def assertError(self, text, message, deterministic=False):
+        path = self.write(text)
+        with self.assertRaises(ValueError) as raised:
+            tables.readText(path, deterministic)
+        self.assertIn(message, str(raised.exception))
+
+    def testErrors(self):
+        self.assertError('a b\nS0 S1 - i\nS1 S0 S2\n',
+                         'Unknown state S2 at line 3')
+        self.assertError('a b\nS0 S1 - i\nS1 S0 - x\n',
+                         "Unknown flags 'x' at line 3")
+        self.assertError('a b\nS0 {S1,S0} - i\nS1 S0 - a\n',
+                         'more than one state on a at line 2', True)
+        self.assertError('a b\nS0 S1 - i\nS0 S0 - a\n',
+                         'Duplicate state S0 at line 3')
+        self.assertError('a b\nS0 S1 - i i\n', 'fields at line 2')
+        self.assertError('a b\nS0 {S1, - i\n', 'at line 2')
+        self.assertError('', 'Missing alphabet at line 1')
+        self.assertError('a a\n', 'Duplicate symbol at line 1')
+        self.assertError('a\nS0 S0 i\nS1 S1 i\n',
+                         'More than one initial state at line 3')
+        path = self.write('a b\nS0 S1 - i\nS1 S0 S2\n')
+        for automata in (fa.FiniteAutomata, nfa.NFiniteAutomata,
+                         dfa.DFiniteAutomata):
+            with self.assertRaises(ValueError):
+                automata(path)
+
+    def testColumnOrder(self):
+        path = self.write('b a\nS0 S1 S0 i\nS1 - S1 a\n')
+        my_dfa = dfa.DFiniteAutomata(path)
+        self.assertTrue(my_dfa.simulate('ab'))
+        self.assertTrue(my_dfa.simulate('aaab'))
+        self.assertFalse(my_dfa.simulate('a'))
+        self.assertFalse(my_dfa.simulate('bb'))
+
+    def testBinary(self):
+        rng = random.Random(17)
+        for name in ('DFA', 'NFA'):
+            text_path = os.path.join(INPUT, name)
+            binary_path = os.path.join(self.directory, name + '.tab')
+            tables.convert(text_path, binary_path)
+            text, binary = tables.read(text_path), tables.read(binary_path)
+            for attribute in ('alphabet', 'states', 'initial', 'accepting',
+                              'src', 'sym', 'dst'):
+                self.assertEqual(getattr(text, attribute),
+                                 getattr(binary, attribute))
+            automata = [fa.FiniteAutomata(text_path),
+                        nfa.NFiniteAutomata(text_path),
+                        nfa.NFiniteAutomata(binary_path)]
+            if name == 'DFA':
+                automata += [dfa.DFiniteAutomata(text_path),
+                             dfa.DFiniteAutomata(binary_path)]
+            for _ in range(200):
+                text = helpers.randomText(rng)
+                expected = fa.FiniteAutomata.simulate(automata[0], text)
+                for automaton in automata[1:]:
+                    self.assertEqual(automaton.simulate(text), expected,
+                                     (name, text))
+
+            with open(binary_path, 'rb') as f:
+                data = f.read()
+            for length in range(len(data)):
+                with open(binary_path, 'wb') as f:
+                    f.write(data[:length])
+                with self.assertRaises(ValueError):
+                    tables.readBinary(binary_path)
+            corrupted = bytearray(data)
+            corrupted[-1] = 0x7f
+            with open(binary_path, 'wb') as f:
+                f.write(corrupted)
+            with self.assertRaises(ValueError) as raised:
+                tables.read(binary_path)
+            self.assertEqual(str(raised.exception), 'Corrupted table data')
+
+    @unittest.skipIf(os.name != 'posix', 'Permission bits are POSIX ones')
+    def testFileMode(self):
+        mode = 0o666 & ~tables._umask     # What open() gives a new file
+        paths = [os.path.join(self.directory, 'DFA.tab'),
+                 os.path.join(self.directory, 'rule.dfa')]
+        tables.convert(os.path.join(INPUT, 'DFA'), paths[0])
+        store.dump(dfa.DFiniteAutomata(ere.Regex('ab*')).minimalDFA()
+                      .compile(), paths[1])
+        disk_cache = store.DiskCache(os.path.join(self.directory, 'cache'))
+        disk_cache.compile('ab*')
+        paths.append(disk_cache.pathOf('ab*'))
+        for path in paths:
+            self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), mode, path)
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         ['DFA.tab', 'cache', 'rule.dfa'])
+
+if __name__ == '__main__':
+    unittest.main()